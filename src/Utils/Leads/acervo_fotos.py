@@ -0,0 +1,86 @@
+import hashlib
+import io
+import os
+import threading
+
+# Caminho público das fotos: o Express serve o acervo em /lead-photos e o
+# gerador de propostas resolve a mesma referência para o arquivo local.
+PREFIXO_REFERENCIA = "/lead-photos"
+# Fotos não baixadas (--fotos referencia): o backend busca o photo_reference
+# na API do Google com a própria chave e devolve a imagem.
+PREFIXO_REFERENCIA_API = f"{PREFIXO_REFERENCIA}/ref"
+
+
+def referencia_api(photo_reference):
+    """Caminho público que o backend resolve para a foto do Google."""
+    return f"{PREFIXO_REFERENCIA_API}/{photo_reference}"
+
+
+class AcervoFotos:
+    """Miniaturas das fotos dos leads em disco, endereçadas pelo conteúdo.
+
+    A referência gravada no lead é derivada do sha256 da miniatura, então a
+    mesma foto baixada duas vezes ocupa um único arquivo e a URL nunca muda
+    de conteúdo (pode ser cacheada para sempre). Sem Pillow, os bytes vindos
+    da API (já pedidos na largura da miniatura) são guardados como estão.
+    """
+
+    def __init__(self, diretorio, largura=320, qualidade=80):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.largura = largura
+        self.qualidade = qualidade
+        self.gravadas = 0
+        self.repetidas = 0
+        self.bytes_gravados = 0
+        self.lock = threading.Lock()
+
+    def miniatura(self, conteudo):
+        # Devolve (bytes, extensão). JPEG progressivo, sem metadados.
+        try:
+            from PIL import Image, ImageOps
+        except ImportError:
+            return conteudo, ".png" if conteudo.startswith(b"\x89PNG") else ".jpg"
+
+        with Image.open(io.BytesIO(conteudo)) as original:
+            imagem = ImageOps.exif_transpose(original).convert("RGB")
+            imagem.thumbnail((self.largura, self.largura), Image.LANCZOS)
+            saida = io.BytesIO()
+            imagem.save(saida, "JPEG", quality=self.qualidade, optimize=True, progressive=True)
+        return saida.getvalue(), ".jpg"
+
+    def caminho(self, referencia):
+        # "/lead-photos/ab/abcd....jpg" -> arquivo dentro do acervo.
+        if not referencia.startswith(f"{PREFIXO_REFERENCIA}/"):
+            raise ValueError(f"referência fora do acervo: {referencia}")
+        relativo = referencia[len(PREFIXO_REFERENCIA) + 1:]
+        if ".." in relativo.split("/"):
+            raise ValueError(f"referência inválida: {referencia}")
+        return os.path.join(self.diretorio, *relativo.split("/"))
+
+    def existe(self, referencia):
+        try:
+            return os.path.exists(self.caminho(referencia))
+        except ValueError:
+            return False
+
+    def guardar(self, conteudo):
+        """Grava a miniatura de `conteudo` e devolve a referência pública."""
+        miniatura, extensao = self.miniatura(conteudo)
+        chave = hashlib.sha256(miniatura).hexdigest()
+        referencia = f"{PREFIXO_REFERENCIA}/{chave[:2]}/{chave}{extensao}"
+        caminho = self.caminho(referencia)
+        if os.path.exists(caminho):
+            with self.lock:
+                self.repetidas += 1
+            return referencia
+
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        tmp = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(miniatura)
+        os.replace(tmp, caminho)
+        with self.lock:
+            self.gravadas += 1
+            self.bytes_gravados += len(miniatura)
+        return referencia
@@ -0,0 +1,437 @@
+"""Benchmark offline do googlePlacesFetch.
+
+Sobe um stub HTTP local no lugar da Places API (fixtures gravadas ou
+sintéticas, com latência, taxa de erro e atraso do next_page_token
+configuráveis) e troca o PostgreSQL por um banco em memória. Nenhuma
+requisição sai da máquina e nenhuma cota é gasta.
+
+Uso:
+    python bench_places.py --concorrencia 1 4 8 --latencia-ms 80
+    python bench_places.py --fixtures gravacao.json --taxa-erro 0.02
+"""
+import argparse
+import hashlib
+import io
+import json
+import math
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import googlePlacesFetch as fetch
+
+STATUS_ERRO = (429, 500, 503)
+CAIXA_SINTETICA = (-8.15, -35.0, -7.95, -34.85)
+
+
+class FixturesSinteticas:
+    """Gera respostas determinísticas a partir de `total_lugares` espalhados em CAIXA_SINTETICA.
+
+    Buscas com location/radius devolvem os lugares dentro do raio, o que
+    permite comparar a varredura em grade com as buscas por termo.
+    """
+
+    def __init__(self, total_lugares=600, taxa_match=0.7, taxa_telefone=0.6):
+        self.total_lugares = total_lugares
+        self.taxa_match = taxa_match
+        self.taxa_telefone = taxa_telefone
+        sul, oeste, norte, leste = CAIXA_SINTETICA
+        # Nome que a última text search deu a cada lugar: o Details devolve o
+        # mesmo, como a API real.
+        self.nomes = {}
+        self.posicoes = []
+        for indice in range(total_lugares):
+            rng = random.Random(self._semente("posicao", indice))
+            self.posicoes.append((rng.uniform(sul, norte), rng.uniform(oeste, leste)))
+
+    def _semente(self, *partes):
+        return int(hashlib.sha256("|".join(map(str, partes)).encode("utf-8")).hexdigest()[:12], 16)
+
+    def _nome(self, termo, indice):
+        rng = random.Random(self._semente("nome", termo, indice))
+        if rng.random() < self.taxa_match:
+            return f"{termo} Bench {indice}"
+        return f"Loja Bench {indice}"
+
+    def _lugar(self, termo, indice):
+        lat, lng = self.posicoes[indice]
+        nome = self.nomes[indice] = self._nome(termo, indice)
+        return {
+            "place_id": f"bench-{indice}",
+            "name": nome,
+            "formatted_address": f"Rua Bench, {indice} - Centro, Recife - PE",
+            "geometry": {"location": {"lat": lat, "lng": lng}},
+            "photos": [{"photo_reference": f"ref-{indice}", "width": 1024, "height": 768}],
+        }
+
+    def textsearch(self, consulta, pagina, local=None):
+        termo = consulta.split(" em ")[0]
+        if local is None:
+            inicio = self._semente(consulta) % self.total_lugares
+            indices = [(inicio + i) % self.total_lugares for i in range(60)]
+        else:
+            lat, lng, raio = local
+            indices = [
+                indice for indice, (plat, plng) in enumerate(self.posicoes)
+                if math.hypot((plat - lat) * 111320, (plng - lng) * 111320 * math.cos(math.radians(lat))) <= raio
+            ][:60]
+        resultados = [self._lugar(termo, indice) for indice in indices[pagina * 20:(pagina + 1) * 20]]
+        status = "OK" if resultados else "ZERO_RESULTS"
+        return {"status": status, "results": resultados}, len(indices) > (pagina + 1) * 20
+
+    def details(self, place_id):
+        indice = int(place_id.rsplit("-", 1)[-1])
+        rng = random.Random(self._semente("details", indice))
+        lat, lng = self.posicoes[indice]
+        resultado = {
+            "name": self.nomes.get(indice, f"Loja Bench {indice}"),
+            "formatted_address": f"Rua Bench, {indice} - Centro, Recife - PE",
+            "geometry": {"location": {"lat": lat, "lng": lng}},
+            "photos": [{"photo_reference": f"ref-{indice}", "width": 1024, "height": 768}],
+        }
+        if rng.random() < self.taxa_telefone:
+            resultado["formatted_phone_number"] = f"(81) 3000-{indice:04d}"
+        return {"status": "OK", "result": resultado}
+
+
+class FixturesGravadas:
+    """Respostas gravadas: {"textsearch": {consulta: [pág0, pág1, ...]}, "details": {place_id: resposta}}."""
+
+    def __init__(self, caminho):
+        with open(caminho, encoding="utf-8") as f:
+            dados = json.load(f)
+        self.buscas = dados.get("textsearch", {})
+        self.detalhes = dados.get("details", {})
+
+    def textsearch(self, consulta, pagina, local=None):
+        paginas = self.buscas.get(consulta, [])
+        if pagina >= len(paginas):
+            return {"status": "ZERO_RESULTS", "results": []}, False
+        return paginas[pagina], pagina + 1 < len(paginas)
+
+    def details(self, place_id):
+        return self.detalhes.get(place_id, {"status": "NOT_FOUND"})
+
+
+class StubPlaces:
+    """Servidor HTTP local que imita os endpoints usados pelo coletor."""
+
+    def __init__(self, fixtures, latencia_ms=50, jitter_ms=20, taxa_erro=0.0, atraso_token_s=1.0):
+        self.fixtures = fixtures
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.taxa_erro = taxa_erro
+        self.atraso_token_s = atraso_token_s
+        self.tokens = {}
+        self.lock = threading.Lock()
+        self.chamadas = 0
+        self.bytes_enviados = 0
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+
+    @property
+    def url_base(self):
+        host, porta = self.servidor.server_address
+        return f"http://{host}:{porta}"
+
+    def iniciar(self):
+        self.thread.start()
+        return self
+
+    def parar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def _novo_token(self, consulta, pagina, local):
+        token = hashlib.sha1(f"{consulta}|{pagina}|{random.random()}".encode("utf-8")).hexdigest()
+        with self.lock:
+            self.tokens[token] = (consulta, pagina, local, time.monotonic() + self.atraso_token_s)
+        return token
+
+    def responder(self, caminho, params):
+        with self.lock:
+            self.chamadas += 1
+        time.sleep(max(0.0, random.gauss(self.latencia_ms, self.jitter_ms)) / 1000)
+        if random.random() < self.taxa_erro:
+            return random.choice(STATUS_ERRO), {}
+
+        if caminho.endswith("/place/textsearch/json"):
+            if "pagetoken" in params:
+                with self.lock:
+                    registro = self.tokens.get(params["pagetoken"])
+                if registro is None or time.monotonic() < registro[3]:
+                    return 200, {"status": "INVALID_REQUEST", "results": []}
+                consulta, pagina, local = registro[:3]
+            else:
+                consulta, pagina, local = params.get("query", ""), 0, None
+                if "location" in params and "radius" in params:
+                    lat, lng = map(float, params["location"].split(","))
+                    local = (lat, lng, float(params["radius"]))
+            data, tem_proxima = self.fixtures.textsearch(consulta, pagina, local)
+            data = dict(data)
+            if tem_proxima:
+                data["next_page_token"] = self._novo_token(consulta, pagina + 1, local)
+            return 200, data
+
+        if caminho.endswith("/place/details/json"):
+            data = self.fixtures.details(params.get("place_id", ""))
+            if "fields" in params and "result" in data:
+                # Como a API: só os campos da máscara ("geometry/location" -> "geometry").
+                campos = {campo.split("/")[0] for campo in params["fields"].split(",")}
+                data = dict(data, result={k: v for k, v in data["result"].items() if k in campos})
+            return 200, data
+
+        if caminho.endswith("/geocode/json"):
+            sul, oeste, norte, leste = CAIXA_SINTETICA
+            return 200, {"status": "OK", "results": [{"geometry": {"viewport": {
+                "southwest": {"lat": sul, "lng": oeste},
+                "northeast": {"lat": norte, "lng": leste},
+            }}}]}
+
+        if caminho.endswith("/place/photo"):
+            return 200, self.foto(params.get("photoreference", ""), int(params.get("maxwidth", 400)))
+
+        return 404, {"status": "NOT_FOUND"}
+
+    def foto(self, referencia, largura):
+        # JPEG sintético na largura pedida (a API real redireciona para a
+        # imagem já redimensionada).
+        from PIL import Image
+
+        cor = tuple(hashlib.sha1(referencia.encode("utf-8")).digest()[:3])
+        saida = io.BytesIO()
+        Image.new("RGB", (largura, largura * 3 // 4), cor).save(saida, "JPEG", quality=90)
+        return saida.getvalue()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {chave: valores[0] for chave, valores in parse_qs(url.query).items()}
+                status, corpo = stub.responder(url.path, params)
+                binario = isinstance(corpo, bytes)
+                conteudo = corpo if binario else json.dumps(corpo).encode("utf-8")
+                with stub.lock:
+                    stub.bytes_enviados += len(conteudo)
+                self.send_response(status)
+                self.send_header("Content-Type", "image/jpeg" if binario else "application/json")
+                self.send_header("Content-Length", str(len(conteudo)))
+                self.end_headers()
+                self.wfile.write(conteudo)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class BancoMemoria:
+    """Substituto em processo da tabela `leads` (só place_id importa aqui)."""
+
+    def __init__(self, latencia_ms=2):
+        self.latencia_ms = latencia_ms
+        self.place_ids = set()
+        self.lock = threading.Lock()
+
+    def inserir(self, leads):
+        time.sleep(self.latencia_ms / 1000)
+        with self.lock:
+            novos = {lead["place_id"] for lead in leads} - self.place_ids
+            self.place_ids.update(novos)
+        return novos
+
+    def indice(self, banco_cronometrado):
+        banco = self
+
+        class IndiceBench:
+            def __init__(self):
+                self.vistos = set()
+
+            def existentes(self, place_ids):
+                time.sleep(banco.latencia_ms / 1000)
+                with banco.lock:
+                    return {p for p in place_ids if p in banco.place_ids or p in self.vistos}
+
+            def adicionar(self, place_id):
+                self.vistos.add(place_id)
+
+        indice = IndiceBench()
+        indice.existentes = banco_cronometrado("dedup", indice.existentes)
+        return indice
+
+
+class Cronometro:
+    def __init__(self):
+        self.amostras = {}
+        self.lock = threading.Lock()
+
+    def envolver(self, etapa, funcao):
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                duracao = time.perf_counter() - inicio
+                with self.lock:
+                    self.amostras.setdefault(etapa, []).append(duracao)
+        return medida
+
+    def percentis(self):
+        resultado = {}
+        for etapa, amostras in sorted(self.amostras.items()):
+            ordenadas = sorted(amostras)
+            resultado[etapa] = {
+                "n": len(ordenadas),
+                "p50_ms": ordenadas[int(0.50 * (len(ordenadas) - 1))] * 1000,
+                "p95_ms": ordenadas[int(0.95 * (len(ordenadas) - 1))] * 1000,
+            }
+        return resultado
+
+
+def reiniciar_pico_rss():
+    # No Linux, "5" em clear_refs zera o pico (VmHWM) do processo, para que
+    # cada cenário meça o próprio pico. Retorna False onde não há suporte.
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def pico_rss_mb(do_cenario):
+    # Pico do cenário (VmHWM, depois de reiniciar_pico_rss) ou, sem suporte,
+    # o do processo inteiro até aqui (ru_maxrss: KB no Linux, bytes no macOS).
+    if do_cenario:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1]) / 1024
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def executar_cenario(stub, concorrencia, termos, tamanho_lote, latencia_db_ms, varredura=False):
+    banco = BancoMemoria(latencia_db_ms)
+    cronometro = Cronometro()
+
+    originais = (fetch.buscar_detalhes, fetch.consultar_places, fetch.inserir_leads, fetch.baixar_foto)
+    fetch.buscar_detalhes = cronometro.envolver("details", originais[0])
+    fetch.consultar_places = cronometro.envolver("textsearch", originais[1])
+    fetch.inserir_leads = cronometro.envolver("insert", banco.inserir)
+    fetch.baixar_foto = cronometro.envolver("photo", originais[3])
+    fetch.contador_requisicoes = 0
+    chamadas_antes = stub.chamadas
+    bytes_antes = stub.bytes_enviados
+    rss_do_cenario = reiniciar_pico_rss()
+
+    try:
+        opcoes = dict(
+            cidade="Recife",
+            estado="PE",
+            termos=termos,
+            salvar_com_telefone=True,
+            salvar_sem_telefone=True,
+            concorrencia=concorrencia,
+            tamanho_lote=tamanho_lote,
+            indice=banco.indice(cronometro.envolver),
+        )
+        inicio = time.perf_counter()
+        if varredura:
+            leads = fetch.varrer_cidade(**opcoes)
+        else:
+            leads = fetch.buscar_lugares(**opcoes)
+        duracao = time.perf_counter() - inicio
+    finally:
+        fetch.buscar_detalhes, fetch.consultar_places, fetch.inserir_leads, fetch.baixar_foto = originais
+
+    requisicoes = fetch.contador_requisicoes
+    return {
+        "concorrencia": concorrencia,
+        "varredura": varredura,
+        "leads": len(leads),
+        "segundos": duracao,
+        "leads_por_segundo": len(leads) / duracao if duracao else 0.0,
+        "requisicoes": requisicoes,
+        "chamadas_http": stub.chamadas - chamadas_antes,
+        "kb_respostas": (stub.bytes_enviados - bytes_antes) / 1024,
+        "requisicoes_por_lead": requisicoes / len(leads) if leads else None,
+        "fotos_locais": sum(1 for lead in leads
+                            if lead["image_urls"] and lead["image_urls"][0].startswith(fetch.PREFIXO_REFERENCIA)),
+        "etapas": cronometro.percentis(),
+        "pico_rss_mb": pico_rss_mb(rss_do_cenario),
+        "pico_rss_cumulativo": not rss_do_cenario,
+    }
+
+
+def imprimir_resultado(resultado):
+    print(f"\n=== concorrência {resultado['concorrencia']}"
+          f"{' (varredura)' if resultado['varredura'] else ''} ===")
+    print(f"leads: {resultado['leads']} em {resultado['segundos']:.2f}s "
+          f"({resultado['leads_por_segundo']:.2f} leads/s)")
+    por_lead = resultado["requisicoes_por_lead"]
+    print(f"requisições: {resultado['requisicoes']} orçadas, {resultado['chamadas_http']} HTTP "
+          f"({por_lead:.2f} por lead)" if por_lead is not None else
+          f"requisições: {resultado['requisicoes']} orçadas, {resultado['chamadas_http']} HTTP")
+    print(f"respostas da API: {resultado['kb_respostas']:.1f} KB")
+    if resultado["fotos_locais"]:
+        print(f"fotos no acervo local: {resultado['fotos_locais']}")
+    for etapa, valores in resultado["etapas"].items():
+        print(f"  {etapa:<10} n={valores['n']:<5} p50={valores['p50_ms']:.1f}ms p95={valores['p95_ms']:.1f}ms")
+    print(f"pico de RSS{' (acumulado desde o início)' if resultado['pico_rss_cumulativo'] else ''}: "
+          f"{resultado['pico_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline do coletor de leads (sem rede e sem PostgreSQL).")
+    parser.add_argument("--fixtures", help="Arquivo JSON com respostas gravadas; sem ele, usa fixtures sintéticas.")
+    parser.add_argument("--termos", nargs="+", default=["Condomínio", "Hotel", "Edifício"], help="Termos buscados em cada cenário.")
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 4, 8], help="Níveis de concorrência a comparar.")
+    parser.add_argument("--lote", type=int, default=50, help="Tamanho do lote de INSERT.")
+    parser.add_argument("--latencia-ms", type=float, default=50, help="Latência média do stub da API.")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="Desvio da latência do stub.")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de respostas 429/5xx do stub.")
+    parser.add_argument("--atraso-token", type=float, default=1.0, help="Segundos até um next_page_token ficar válido.")
+    parser.add_argument("--latencia-db-ms", type=float, default=2, help="Latência simulada de cada operação no banco.")
+    parser.add_argument("--rps", type=float, default=0, help="Ritmo do limitador durante o benchmark (0 = sem limite).")
+    parser.add_argument("--campos", choices=sorted(fetch.NIVEIS_CAMPOS), default="minimo", help="Máscara do Details usada nos cenários.")
+    parser.add_argument("--fotos", choices=["url", "referencia", "local"], default="url", help="Modo das fotos; com local, as miniaturas vão para um acervo temporário.")
+    parser.add_argument("--fotos-concorrencia", type=int, default=4, help="Downloads de fotos em paralelo com --fotos local.")
+    parser.add_argument("--varredura", action="store_true", help="Mede também o modo de varredura em grade.")
+    parser.add_argument("--json", dest="saida_json", help="Grava os resultados neste arquivo JSON.")
+    args = parser.parse_args()
+
+    fixtures = FixturesGravadas(args.fixtures) if args.fixtures else FixturesSinteticas()
+    stub = StubPlaces(fixtures, args.latencia_ms, args.jitter_ms, args.taxa_erro, args.atraso_token).iniciar()
+    fetch.GOOGLE_MAPS_BASE_URL = stub.url_base
+    fetch.cache = None
+    fetch.configurar_ritmo(args.rps, max(1, int(args.rps)), 5)
+    fetch.configurar_detalhes(args.campos, args.fotos)
+    acervo_temporario = tempfile.TemporaryDirectory()
+    if args.fotos == "local":
+        fetch.configurar_acervo(acervo_temporario.name, args.fotos_concorrencia)
+
+    resultados = []
+    try:
+        for concorrencia in args.concorrencia:
+            resultados.append(executar_cenario(stub, concorrencia, args.termos, args.lote, args.latencia_db_ms))
+            if args.varredura:
+                resultados.append(executar_cenario(stub, concorrencia, args.termos, args.lote,
+                                                   args.latencia_db_ms, varredura=True))
+    finally:
+        stub.parar()
+        acervo_temporario.cleanup()
+
+    for resultado in resultados:
+        imprimir_resultado(resultado)
+
+    if args.saida_json:
+        with open(args.saida_json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,239 @@
+import re
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+# Análise dos endereços formatados do Google Places no Brasil, p. ex.:
+#   "R. Amélia, 123 - Graças, Recife - PE, 52011-050, Brasil"
+#   "Av. Boa Viagem - Boa Viagem, Recife - PE, 51020-000"
+#   "Edifício Mirante, Av. Beira Mar, 100 - Pina, Recife - State of Pernambuco"
+# O bairro é o trecho depois do último " - " no segmento que vem antes de
+# "Cidade - UF", e não o segundo segmento separado por vírgula.
+
+TAMANHO_CACHE_ENDERECOS = 50000
+
+ESTADOS = {
+    "AC": "Acre", "AL": "Alagoas", "AP": "Amapá", "AM": "Amazonas", "BA": "Bahia",
+    "CE": "Ceará", "DF": "Distrito Federal", "ES": "Espírito Santo", "GO": "Goiás",
+    "MA": "Maranhão", "MT": "Mato Grosso", "MS": "Mato Grosso do Sul", "MG": "Minas Gerais",
+    "PA": "Pará", "PB": "Paraíba", "PR": "Paraná", "PE": "Pernambuco", "PI": "Piauí",
+    "RJ": "Rio de Janeiro", "RN": "Rio Grande do Norte", "RS": "Rio Grande do Sul",
+    "RO": "Rondônia", "RR": "Roraima", "SC": "Santa Catarina", "SP": "São Paulo",
+    "SE": "Sergipe", "TO": "Tocantins",
+}
+PAISES = {"brasil", "brazil"}
+
+RE_CEP = re.compile(r"\b(\d{5})-?(\d{3})\b")
+RE_NUMERO = re.compile(r"^(\d+[a-z]?|s/?n|sn|km \d+)$")
+# Abreviações comuns em nomes de bairro, expandidas só para comparar grafias.
+ABREVIACOES = {
+    "jd": "jardim", "jdm": "jardim", "vl": "vila", "pq": "parque", "cj": "conjunto",
+    "conj": "conjunto", "res": "residencial", "sta": "santa", "sto": "santo",
+    "n": "nossa", "sra": "senhora", "nsa": "nossa senhora", "dr": "doutor",
+    "pres": "presidente", "cel": "coronel", "gov": "governador", "eng": "engenheiro",
+}
+# Segmentos que são logradouro ou nome do lugar, não bairro.
+PREFIXOS_LOGRADOURO = (
+    "rua", "r", "avenida", "av", "travessa", "tv", "trav", "estrada", "est", "rodovia", "rod",
+    "alameda", "al", "praca", "pc", "largo", "beco", "via", "viela", "br", "pe", "ladeira",
+)
+PREFIXOS_LUGAR = ("condominio", "edificio", "ed", "residencial", "hotel", "predio", "pousada", "shopping", "torre")
+# Complementos do número ("Apto 12", "Loja 3"), que também não são bairro.
+PREFIXOS_COMPLEMENTO = ("apto", "apt", "apartamento", "sala", "loja", "lj", "bloco", "bl", "casa", "andar",
+                        "lote", "lt", "quadra", "qd", "box", "galpao", "conjunto")
+
+Endereco = namedtuple("Endereco", "logradouro numero bairro cidade uf cep")
+
+
+def dobrar_acentos(texto):
+    # "São José" -> "sao jose": sem acentos, minúsculas e espaços únicos.
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.casefold().split())
+
+
+_UF_POR_NOME = {dobrar_acentos(nome): uf for uf, nome in ESTADOS.items()}
+
+
+def sigla_uf(texto):
+    # "PE", "Pernambuco", "State of Pernambuco" ou "Estado de Pernambuco" -> "PE".
+    dobrado = dobrar_acentos(texto)
+    for prefixo in ("state of ", "estado de ", "estado do ", "estado da "):
+        if dobrado.startswith(prefixo):
+            dobrado = dobrado[len(prefixo):]
+    if dobrado.upper() in ESTADOS:
+        return dobrado.upper()
+    return _UF_POR_NOME.get(dobrado)
+
+
+@lru_cache(maxsize=TAMANHO_CACHE_ENDERECOS)
+def chave_bairro(nome):
+    """Forma comparável de um nome de bairro ("Jd. São Paulo" -> "jardim sao paulo")."""
+    palavras = re.sub(r"[^\w/]+", " ", dobrar_acentos(nome)).split()
+    if palavras and palavras[0] == "bairro":
+        palavras = palavras[1:]
+    return " ".join(ABREVIACOES.get(palavra, palavra) for palavra in palavras)
+
+
+def _comeca_com(segmento, prefixos):
+    palavras = re.sub(r"[^\w]+", " ", dobrar_acentos(segmento)).split()
+    return bool(palavras) and palavras[0] in prefixos
+
+
+def _eh_numero(segmento):
+    return bool(RE_NUMERO.match(dobrar_acentos(segmento)))
+
+
+def _separar_cidade_uf(segmento):
+    # "Recife - PE" -> ("Recife", "PE"); "Pernambuco" sozinho -> ("", "PE").
+    if " - " in segmento:
+        cidade, _, sufixo = segmento.rpartition(" - ")
+        uf = sigla_uf(sufixo)
+        if uf:
+            return cidade.strip(), uf
+    uf = sigla_uf(segmento)
+    return ("", uf) if uf else None
+
+
+@lru_cache(maxsize=TAMANHO_CACHE_ENDERECOS)
+def analisar_endereco(endereco):
+    """Separa um endereço formatado em logradouro, número, bairro, cidade, UF e CEP.
+
+    Campos não encontrados voltam como "". O resultado é memoizado (LRU).
+    """
+    partes = [parte.strip() for parte in (endereco or "").split(",") if parte.strip()]
+    if partes and dobrar_acentos(partes[-1]) in PAISES:
+        partes.pop()
+
+    cep = ""
+    sem_cep = []
+    for parte in partes:
+        achado = RE_CEP.search(parte)
+        if achado and not cep:
+            cep = f"{achado.group(1)}-{achado.group(2)}"
+            parte = (parte[:achado.start()] + parte[achado.end():]).strip(" -")
+        if parte:
+            sem_cep.append(parte)
+    partes = sem_cep
+
+    # "Cidade - UF" procurado do fim para o começo; "Cidade, UF" também vale.
+    cidade, uf, indice_cidade = "", "", len(partes)
+    for i in range(len(partes) - 1, -1, -1):
+        separado = _separar_cidade_uf(partes[i])
+        if separado is None:
+            continue
+        cidade, uf = separado
+        indice_cidade = i
+        # "..., Recife, PE": a cidade é o segmento anterior, se não for rua
+        # nem número.
+        anterior = partes[i - 1] if i >= 1 else ""
+        if (not cidade and anterior and " - " not in anterior and not _eh_numero(anterior)
+                and not _comeca_com(anterior, PREFIXOS_LOGRADOURO)):
+            cidade, indice_cidade = anterior, i - 1
+        break
+
+    antes = partes[:indice_cidade]
+    logradouro, numero, bairro = (antes[0] if antes else ""), "", ""
+    if len(antes) >= 2:
+        ultimo = antes[-1]
+        if " - " in ultimo:
+            cabeca, _, bairro = ultimo.rpartition(" - ")
+            if _eh_numero(cabeca):
+                numero = cabeca
+        elif _eh_numero(ultimo):
+            numero = ultimo
+        elif not (_comeca_com(ultimo, PREFIXOS_LOGRADOURO) or _comeca_com(ultimo, PREFIXOS_LUGAR)
+                  or _comeca_com(ultimo, PREFIXOS_COMPLEMENTO)):
+            # Bairro em segmento próprio: "Rua A, 10, Jardim América, São Paulo - SP".
+            bairro = ultimo
+            if len(antes) >= 3 and _eh_numero(antes[-2]):
+                numero = antes[-2]
+    elif " - " in logradouro:
+        # "Av. Boa Viagem - Boa Viagem, Recife - PE"
+        logradouro, _, bairro = logradouro.rpartition(" - ")
+    elif antes and indice_cidade < len(partes):
+        # Um único segmento antes da cidade: é o bairro se não for rua,
+        # número ou o nome do próprio lugar ("Boa Viagem, Recife - PE").
+        if not (_comeca_com(logradouro, PREFIXOS_LOGRADOURO) or _comeca_com(logradouro, PREFIXOS_LUGAR)
+                or _eh_numero(logradouro)):
+            bairro, logradouro = logradouro, ""
+
+    bairro = bairro.strip()
+    if not bairro_valido(bairro, cidade):
+        bairro = ""
+    return Endereco(logradouro.strip(), numero, bairro, cidade, uf, cep)
+
+
+# Endereços de exemplo e o resultado esperado: fixam o comportamento do
+# analisador (python enderecos.py confere todos).
+EXEMPLOS = [
+    ("R. Amélia, 123 - Graças, Recife - PE, 52011-050, Brasil",
+     Endereco("R. Amélia", "123", "Graças", "Recife", "PE", "52011-050")),
+    ("Av. Boa Viagem - Boa Viagem, Recife - PE, 51020-000",
+     Endereco("Av. Boa Viagem", "", "Boa Viagem", "Recife", "PE", "51020-000")),
+    ("Edifício Mirante, Av. Beira Mar, 100 - Pina, Recife - State of Pernambuco",
+     Endereco("Edifício Mirante", "100", "Pina", "Recife", "PE", "")),
+    ("Rua A, 10, Jardim América, São Paulo - SP",
+     Endereco("Rua A", "10", "Jardim América", "São Paulo", "SP", "")),
+    ("R. das Flores, s/n - Jd. São Paulo, Recife - PE",
+     Endereco("R. das Flores", "s/n", "Jd. São Paulo", "Recife", "PE", "")),
+    ("Boa Viagem, Recife - PE", Endereco("", "", "Boa Viagem", "Recife", "PE", "")),
+    ("Shopping Recife, Boa Viagem, Recife - PE", Endereco("Shopping Recife", "", "Boa Viagem", "Recife", "PE", "")),
+    ("R. Amélia, 123, Recife, PE", Endereco("R. Amélia", "123", "", "Recife", "PE", "")),
+    ("Rua A, Apto 12, Recife - PE", Endereco("Rua A", "", "", "Recife", "PE", "")),
+    ("Rua A, 10, Recife - PE", Endereco("Rua A", "10", "", "Recife", "PE", "")),
+    ("Recife, PE", Endereco("", "", "", "Recife", "PE", "")),
+    ("Recife - PE, 50000-000, Brasil", Endereco("", "", "", "Recife", "PE", "50000-000")),
+    ("Av. Recife, 500 - Recife, Recife - PE", Endereco("Av. Recife", "500", "", "Recife", "PE", "")),
+    ("Pernambuco, Brasil", Endereco("", "", "", "", "PE", "")),
+    ("", Endereco("", "", "", "", "", "")),
+]
+
+
+def conferir_exemplos():
+    """Devolve (endereço, esperado, obtido) de cada exemplo que não confere."""
+    return [(endereco, esperado, analisar_endereco(endereco))
+            for endereco, esperado in EXEMPLOS if analisar_endereco(endereco) != esperado]
+
+
+def bairro_valido(nome, cidade=""):
+    # Descarta o que a extração antiga gravava por engano: UF, cidade, números.
+    if not nome or sigla_uf(nome) or _eh_numero(nome) or RE_CEP.search(nome):
+        return False
+    return not cidade or chave_bairro(nome) != chave_bairro(cidade)
+
+
+def dicionario_bairros(linhas, cidade=""):
+    """{chave_bairro: grafia canônica} a partir de (bairro, ocorrências).
+
+    Vence a grafia mais frequente; no empate, a que tem acentos.
+    """
+    melhores = {}
+    for nome, ocorrencias in linhas:
+        nome = " ".join((nome or "").split())
+        if not bairro_valido(nome, cidade):
+            continue
+        chave = chave_bairro(nome)
+        acentos = sum(1 for c in nome if ord(c) > 127)
+        candidato = (ocorrencias, acentos, nome)
+        if chave not in melhores or candidato > melhores[chave]:
+            melhores[chave] = candidato
+    return {chave: nome for chave, (_, _, nome) in melhores.items()}
+
+
+def normalizar_bairro(nome, canonicos=None):
+    """Grafia canônica do bairro na cidade (ou o próprio nome, sem espaços extras)."""
+    nome = " ".join((nome or "").split())
+    if not nome:
+        return ""
+    return (canonicos or {}).get(chave_bairro(nome), nome)
+
+
+if __name__ == "__main__":
+    import sys
+
+    falhas = conferir_exemplos()
+    for endereco, esperado, obtido in falhas:
+        print(f"ERRO {endereco!r}\n  esperado: {tuple(esperado)}\n  obtido:   {tuple(obtido)}")
+    print(f"{len(EXEMPLOS) - len(falhas)}/{len(EXEMPLOS)} endereços conferem.")
+    sys.exit(1 if falhas else 0)
@@ -1,14 +1,22 @@
 import requests
-import pandas as pd
 import time
 from datetime import datetime
 import json
 import sys
 import argparse
+import threading
+import math
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import os
-import psycopg2
-from psycopg2 import Error
+from contextlib import contextmanager
+from rate_limiter import TokenBucket, Backoff
+from places_cache import CacheRespostas
+from metricas import Metricas
+from acervo_fotos import AcervoFotos, PREFIXO_REFERENCIA, PREFIXO_REFERENCIA_API, referencia_api
+from enderecos import analisar_endereco, bairro_valido, dicionario_bairros, normalizar_bairro
 
 load_dotenv()
 API_KEY = os.getenv("GOOGLE_PLACES_API_KEY")
@@ -19,16 +27,77 @@ PGDATABASE = os.getenv("PGDATABASE")
 PGUSER = os.getenv("PGUSER")
 PGPASSWORD = os.getenv("PGPASSWORD")
 
-if not API_KEY:
-    raise EnvironmentError("API_KEY não encontrada no .env")
+# Permite apontar o coletor para um stub local (ver bench_places.py).
+GOOGLE_MAPS_BASE_URL = os.getenv("GOOGLE_MAPS_BASE_URL", "https://maps.googleapis.com/maps/api")
 
-if not all([PGHOST, PGPORT, PGDATABASE, PGUSER, PGPASSWORD]):
-    raise EnvironmentError("Credenciais do PostgreSQL não encontradas no .env")
+def validar_configuracao():
+    # Validado na execução, não na importação, para que o módulo possa ser
+    # importado sem credenciais (benchmarks e ferramentas offline).
+    if not API_KEY:
+        raise EnvironmentError("API_KEY não encontrada no .env")
+
+    if not all([PGHOST, PGPORT, PGDATABASE, PGUSER, PGPASSWORD]):
+        raise EnvironmentError("Credenciais do PostgreSQL não encontradas no .env")
 
 LIMITE_REQUISICOES = 900 
+TIMEOUT_REQUISICAO = 30
+HTTP_RETENTAVEIS = {429, 500, 502, 503, 504}
+MAX_CONEXOES_DB = 4
+CAMPOS_DETALHES = "name,formatted_address,formatted_phone_number,geometry/location,photos"
+# Níveis de máscara do Details. O text search já traz endereço, coordenadas e
+# fotos; no nível mínimo o Details pede só o que falta para qualificar o lead
+# (o telefone) e o complemento é buscado apenas se a busca não trouxe o resto.
+NIVEIS_CAMPOS = {
+    "minimo": "name,formatted_phone_number",
+    "completo": CAMPOS_DETALHES,
+}
+CAMPOS_COMPLEMENTARES = "formatted_address,geometry/location,photos"
+# No --refresh só se buscam os campos que costumam mudar.
+CAMPOS_REFRESH = "formatted_address,formatted_phone_number"
+LARGURA_FOTO = 400
+# Com --fotos local a foto é baixada já na largura da miniatura.
+LARGURA_MINIATURA = 320
+STATUS_CACHEAVEIS = {"OK", "ZERO_RESULTS"}
+# Lugar removido ou que o place_id não encontra mais: repetir não adianta.
+STATUS_LUGAR_INEXISTENTE = {"NOT_FOUND", "ZERO_RESULTS"}
+RESULTADOS_MAXIMOS_BUSCA = 60
+RAIO_MAXIMO_BUSCA = 50000
+RAIO_TERRA_M = 6371000
+CACHE_DIR_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+HISTORICO_JOBS_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "rendimento_jobs.json")
+CHECKPOINT_DIR_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backup")
+ACERVO_FOTOS_PADRAO = os.getenv("LEAD_PHOTOS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fotos"))
 
 
 contador_requisicoes = 0
+_lock_requisicoes = threading.Lock()
+# Coleta em andamento na thread atual, para atribuir requisições a cada job.
+_contexto = threading.local()
+
+_pool = None
+_lock_pool = threading.Lock()
+
+limitador = TokenBucket(taxa=10, rajada=10)
+backoff = Backoff(base=0.5, maximo=30.0, tentativas=5)
+backoff_pagetoken = Backoff(base=1.0, maximo=8.0, tentativas=5)
+
+cache = None
+campos_detalhes = NIVEIS_CAMPOS["minimo"]
+modo_fotos = "url"
+acervo = None
+fotos_concorrencia = 4
+usar_bairros_canonicos = False
+ultimo_resumo = {}
+metricas = Metricas()
+
+class RetentativasEsgotadas(requests.exceptions.RequestException):
+    pass
+
+def configurar_ritmo(rps, rajada, tentativas):
+    global limitador, backoff, backoff_pagetoken
+    limitador = TokenBucket(taxa=rps, rajada=rajada)
+    backoff = Backoff(base=0.5, maximo=30.0, tentativas=tentativas)
+    backoff_pagetoken = Backoff(base=1.0, maximo=8.0, tentativas=tentativas)
 
 def checar_limite():
     global contador_requisicoes
@@ -36,239 +105,1410 @@ def checar_limite():
         return True
     return False
 
+def reservar_requisicao():
+    # Reserva uma requisição do orçamento de forma atômica, para que várias
+    # threads nunca ultrapassem LIMITE_REQUISICOES.
+    global contador_requisicoes
+    with _lock_requisicoes:
+        if contador_requisicoes >= LIMITE_REQUISICOES:
+            return False
+        contador_requisicoes += 1
+        coleta = getattr(_contexto, "coleta", None)
+        if coleta is not None:
+            coleta.requisicoes += 1
+        return True
+
+def liberar_requisicao():
+    # Devolve ao orçamento uma reserva cuja requisição falhou.
+    global contador_requisicoes
+    with _lock_requisicoes:
+        contador_requisicoes -= 1
+        coleta = getattr(_contexto, "coleta", None)
+        if coleta is not None:
+            coleta.requisicoes -= 1
+
+def configurar_cache(diretorio, ttl_dias, max_entradas):
+    global cache
+    cache = CacheRespostas(diretorio, ttl_segundos=ttl_dias * 86400, max_entradas=max_entradas)
+
+def configurar_detalhes(nivel, fotos):
+    global campos_detalhes, modo_fotos
+    campos_detalhes = NIVEIS_CAMPOS[nivel]
+    modo_fotos = fotos
+
+def configurar_acervo(diretorio, concorrencia):
+    global acervo, fotos_concorrencia
+    acervo = AcervoFotos(diretorio, largura=LARGURA_MINIATURA)
+    fotos_concorrencia = max(1, concorrencia)
+
+def resolver_url_foto(referencia, largura=LARGURA_FOTO):
+    # Leads gravados com --fotos referencia guardam /lead-photos/ref/<ref>,
+    # que o backend resolve sem expor a chave; aqui a URL da API é montada
+    # direto. Fotos do acervo local (--fotos local) já são um caminho
+    # servido pelo backend.
+    if referencia.startswith(f"{PREFIXO_REFERENCIA_API}/"):
+        referencia = referencia[len(PREFIXO_REFERENCIA_API) + 1:]
+    elif referencia.startswith(("http://", "https://", f"{PREFIXO_REFERENCIA}/")):
+        return referencia
+    return f"{GOOGLE_MAPS_BASE_URL}/place/photo?maxwidth={largura}&photoreference={referencia}&key={API_KEY}"
+
+def endpoint_da_url(url):
+    # ".../place/details/json" -> "details", ".../geocode/json" -> "geocode"
+    return url.rstrip("/").split("/")[-2]
+
+def medir_etapa(etapa):
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            with metricas.cronometrar("etapa_segundos", etapa=etapa):
+                return funcao(*args, **kwargs)
+        return medida
+    return decorador
+
+def exportar_metricas(caminho_json=None, caminho_prometheus=None):
+    metricas.definir("orcamento_requisicoes_usadas", contador_requisicoes)
+    metricas.definir("orcamento_requisicoes_limite", LIMITE_REQUISICOES)
+    if cache is not None:
+        metricas.definir("cache_acertos", cache.acertos)
+        metricas.definir("cache_falhas", cache.falhas)
+    if acervo is not None:
+        metricas.definir("acervo_fotos_gravadas", acervo.gravadas)
+        metricas.definir("acervo_fotos_bytes", acervo.bytes_gravados)
+
+    if caminho_json == "-":
+        print(json.dumps({"metricas": metricas.para_dict()}, ensure_ascii=False), file=sys.stderr)
+    elif caminho_json:
+        with open(caminho_json, "w", encoding="utf-8") as f:
+            json.dump(metricas.para_dict(), f, ensure_ascii=False, indent=2)
+    if caminho_prometheus:
+        with open(caminho_prometheus, "w", encoding="utf-8") as f:
+            f.write(metricas.para_prometheus())
+
+def requisitar_api(url, params, endpoint, esperas, ler_resposta):
+    # Laço comum das chamadas à API: respeita o limitador e repete com
+    # backoff em 429/5xx e falhas de rede. ler_resposta(res) devolve
+    # (status, repetir, resultado) para cada resposta que não é 429/5xx.
+    while True:
+        esperado = limitador.adquirir()
+        if esperado:
+            metricas.observar("espera_segundos", esperado, motivo="limitador")
+        try:
+            with metricas.cronometrar("api_latencia_segundos", endpoint=endpoint):
+                res = requests.get(url, params=params, timeout=TIMEOUT_REQUISICAO)
+            if res.status_code in HTTP_RETENTAVEIS:
+                motivo = f"HTTP {res.status_code}"
+                metricas.incrementar("api_respostas_total", endpoint=endpoint, status=res.status_code)
+            else:
+                res.raise_for_status()
+                status, repetir, resultado = ler_resposta(res)
+                metricas.incrementar("api_respostas_total", endpoint=endpoint, status=status)
+                if not repetir:
+                    return resultado
+                motivo = status
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            motivo = str(e)
+            metricas.incrementar("api_respostas_total", endpoint=endpoint, status=type(e).__name__)
+
+        espera = next(esperas, None)
+        if espera is None:
+            raise RetentativasEsgotadas(f"tentativas esgotadas ({motivo})")
+        metricas.incrementar("api_retentativas_total", endpoint=endpoint)
+        metricas.observar("espera_segundos", espera, motivo="backoff")
+        time.sleep(espera)
+
+def requisitar_places(url, params):
+    # Chamada com resposta JSON: além de 429/5xx, repete OVER_QUERY_LIMIT.
+    # Um next_page_token recém-emitido responde INVALID_REQUEST até ficar
+    # pronto, então também é repetido.
+    usa_pagetoken = "pagetoken" in params
+
+    def ler_json(res):
+        data = res.json()
+        status = data.get("status")
+        repetir = status == "OVER_QUERY_LIMIT" or (status == "INVALID_REQUEST" and usa_pagetoken)
+        return status, repetir, data
+
+    esperas = (backoff_pagetoken if usa_pagetoken else backoff).esperas()
+    return requisitar_api(url, params, endpoint_da_url(url), esperas, ler_json)
+
 def extrair_bairro(endereco):
+    # Ver enderecos.analisar_endereco: reconhece CEP e "Cidade - UF" em vez
+    # de pegar o segundo trecho separado por vírgula.
+    return analisar_endereco(endereco or "").bairro
+
+def configurar_bairros(ativo):
+    global usar_bairros_canonicos
+    usar_bairros_canonicos = ativo
+
+@functools.lru_cache(maxsize=128)
+def bairros_canonicos(cidade, estado):
+    # Grafia mais usada de cada bairro da cidade na tabela leads, carregada
+    # uma vez por cidade. Sem banco, fica sem dicionário.
     try:
-        partes = endereco.split(",")
-        if len(partes) >= 2:
-            pos_virgula = partes[1]
-            subpartes = pos_virgula.split("-")
-            if len(subpartes) >= 2:
-                bairro = subpartes[-1].strip()
-                return bairro
-        return ""
-    except Exception as e:
-        print(f"Erro ao extrair bairro: {e}", file=sys.stderr)
-        return ""
-
-def buscar_detalhes(place_id):
-    global contador_requisicoes
-    if checar_limite():
-        print("🚫 Limite de requisições atingido.", file=sys.stderr)
+        with conexao_db() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+    SELECT neighborhood, COUNT(*)
+    FROM leads
+    WHERE lower(city) = %s AND upper(state) = %s
+      AND neighborhood IS NOT NULL AND neighborhood <> ''
+    GROUP BY neighborhood
+""", (cidade, estado))
+            linhas = cur.fetchall()
+            cur.close()
+    except Exception as error:
+        print(f"Erro ao carregar os bairros de {cidade}/{estado}: {error}", file=sys.stderr)
         return {}
+    return dicionario_bairros(linhas, cidade)
+
+def canonizar_bairro(bairro, cidade, estado):
+    # Grafia canônica do bairro na cidade, quando o dicionário está ativo.
+    if not bairro or not usar_bairros_canonicos or not (cidade and estado):
+        return bairro
+    return normalizar_bairro(bairro, bairros_canonicos(cidade.strip().casefold(), estado.strip().upper()))
+
+def bairro_do_endereco(endereco, cidade=None, estado=None):
+    # Sem cidade/UF informadas, usa as do próprio endereço.
+    analisado = analisar_endereco(endereco or "")
+    return canonizar_bairro(analisado.bairro, cidade or analisado.cidade, estado or analisado.uf)
+
+@medir_etapa("details")
+def consultar_detalhes(place_id, campos=None, ler_cache=True):
+    # Retorna (status, result). Status None quando a resposta não veio
+    # (limite de requisições ou falha de rede): só esses vale repetir.
+    # ler_cache=False pergunta sempre à API (o refresh não pode confiar
+    # numa resposta guardada); a resposta nova ainda vai para o cache.
+    campos = campos or campos_detalhes
+    chave_cache = CacheRespostas.chave("details", place_id, campos)
+    if cache is not None and ler_cache:
+        data = cache.obter(chave_cache)
+        metricas.incrementar("cache_total", endpoint="details", resultado="falha" if data is None else "acerto")
+        if data is not None:
+            return data.get("status"), data.get("result", {})
+
+    if not reservar_requisicao():
+        print("🚫 Limite de requisições atingido.", file=sys.stderr)
+        return None, {}
     
-    url = "https://maps.googleapis.com/maps/api/place/details/json"
+    url = f"{GOOGLE_MAPS_BASE_URL}/place/details/json"
     params = {
         "place_id": place_id,
-        "fields": "name,formatted_address,formatted_phone_number,geometry/location,photos",
+        "fields": campos,
         "key": API_KEY
     }
     try:
-        res = requests.get(url, params=params)
-        res.raise_for_status()
-        contador_requisicoes += 1
-        return res.json().get("result", {})
+        data = requisitar_places(url, params)
+        if cache is not None and data.get("status") in STATUS_CACHEAVEIS:
+            cache.guardar(chave_cache, data)
+        return data.get("status"), data.get("result", {})
     except requests.exceptions.RequestException as e:
+        liberar_requisicao()
         print(f"⚠️ Erro ao buscar detalhes para {place_id}: {e}", file=sys.stderr)
-        return {}
+        return None, {}
+
+def buscar_detalhes(place_id, campos=None):
+    return consultar_detalhes(place_id, campos)[1]
 
+def _requisitar_foto(referencia):
+    # A resposta é a imagem (depois do redirect da API), não um JSON.
+    url = f"{GOOGLE_MAPS_BASE_URL}/place/photo"
+    params = {"maxwidth": LARGURA_MINIATURA, "photoreference": referencia, "key": API_KEY}
+    return requisitar_api(url, params, "photo", backoff.esperas(),
+                          lambda res: (res.status_code, False, res.content))
+
+@medir_etapa("photo")
+def baixar_foto(referencia):
+    # Baixa a foto para o acervo e devolve a referência local, ou None (sem
+    # orçamento ou com erro: o lead fica com /lead-photos/ref/<ref>).
+    chave_cache = CacheRespostas.chave("photo", referencia, LARGURA_MINIATURA)
+    if cache is not None:
+        data = cache.obter(chave_cache)
+        if data is not None and acervo.existe(data["referencia"]):
+            metricas.incrementar("fotos_total", resultado="reaproveitada")
+            return data["referencia"]
+
+    if not reservar_requisicao():
+        metricas.incrementar("fotos_total", resultado="sem_orcamento")
+        return None
+    try:
+        local = acervo.guardar(_requisitar_foto(referencia))
+    except (requests.exceptions.RequestException, OSError, ValueError) as e:
+        liberar_requisicao()
+        metricas.incrementar("fotos_total", resultado="falha")
+        print(f"⚠️ Erro ao baixar foto {referencia[:20]}...: {e}", file=sys.stderr)
+        return None
+
+    metricas.incrementar("fotos_total", resultado="baixada")
+    if cache is not None:
+        cache.guardar(chave_cache, {"referencia": local})
+    return local
+
+@contextmanager
+def conexao_db():
+    # Empresta uma conexão do pool compartilhado pela execução inteira.
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            # psycopg2 só é importado quando alguém precisa do banco.
+            from psycopg2 import pool
+            _pool = pool.ThreadedConnectionPool(
+                1, MAX_CONEXOES_DB,
+                host=PGHOST, port=PGPORT, database=PGDATABASE, user=PGUSER, password=PGPASSWORD
+            )
+    conn = _pool.getconn()
+    try:
+        yield conn
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        _pool.putconn(conn)
+
+def configurar_pool_db(max_conexoes):
+    global MAX_CONEXOES_DB
+    MAX_CONEXOES_DB = max(MAX_CONEXOES_DB, max_conexoes)
+
+def fechar_pool_db():
+    global _pool
+    with _lock_pool:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+@medir_etapa("dedup")
 def get_existing_place_ids():
+    # Cursor nomeado (server-side): as linhas chegam em blocos de itersize
+    # em vez de um fetchall() com a tabela inteira.
     existing_place_ids = set()
-    conn = None
     try:
-        conn = psycopg2.connect(host=PGHOST, port=PGPORT, database=PGDATABASE, user=PGUSER, password=PGPASSWORD)
-        cur = conn.cursor()
-        cur.execute("SELECT place_id FROM leads")
-        for row in cur.fetchall():
-            existing_place_ids.add(row[0])
-        cur.close()
-    except (Exception, Error) as error:
+        with conexao_db() as conn:
+            cur = conn.cursor(name="place_ids_existentes")
+            cur.itersize = 5000
+            cur.execute("SELECT place_id FROM leads WHERE place_id IS NOT NULL")
+            for row in cur:
+                existing_place_ids.add(row[0])
+            cur.close()
+            conn.commit()
+    except Exception as error:
         print(f"Erro ao conectar ou consultar o PostgreSQL: {error}", file=sys.stderr)
-    finally:
-        if conn:
-            conn.close()
     return existing_place_ids
 
-def insert_lead_to_db(lead_data):
-    conn = None
-    try:
-        conn = psycopg2.connect(host=PGHOST, port=PGPORT, database=PGDATABASE, user=PGUSER, password=PGPASSWORD)
+class IndiceConsulta:
+    """Deduplicação por página: pergunta ao banco só pelos place_ids da página.
+
+    O custo acompanha o tamanho da página, não o da tabela `leads`.
+    """
+
+    def __init__(self):
+        self.vistos = set()
+
+    @medir_etapa("dedup")
+    def existentes(self, place_ids):
+        candidatos = [place_id for place_id in place_ids if place_id not in self.vistos]
+        encontrados = set(place_ids) & self.vistos
+        if not candidatos:
+            return encontrados
+        try:
+            with conexao_db() as conn:
+                cur = conn.cursor()
+                cur.execute("SELECT place_id FROM leads WHERE place_id = ANY(%s)", (candidatos,))
+                encontrados.update(row[0] for row in cur.fetchall())
+                cur.close()
+                conn.commit()
+        except Exception as error:
+            print(f"Erro ao consultar place_ids existentes no PostgreSQL: {error}", file=sys.stderr)
+        return encontrados
+
+    def adicionar(self, place_id):
+        self.vistos.add(place_id)
+
+class IndiceMemoria:
+    """Deduplicação com todos os place_ids carregados em memória no início."""
+
+    def __init__(self):
+        self.vistos = get_existing_place_ids()
+        print(f"\n{len(self.vistos)} leads existentes carregados do Seu Banco de Dados.", file=sys.stderr)
+
+    def existentes(self, place_ids):
+        return {place_id for place_id in place_ids if place_id in self.vistos}
+
+    def adicionar(self, place_id):
+        self.vistos.add(place_id)
+
+INDICES_DEDUP = {
+    "consulta": IndiceConsulta,
+    "memoria": IndiceMemoria,
+}
+
+def _linha_lead(lead_data):
+    return (
+        lead_data["place_id"],
+        lead_data["name"],
+        lead_data["formatted_address"],
+        lead_data["city"],
+        lead_data["state"],
+        lead_data["neighborhood"],
+        lead_data["formatted_phone_number"],
+        lead_data["coordinates"]["lat"],
+        lead_data["coordinates"]["lng"],
+        lead_data["image_urls"],
+        lead_data["type"],
+        lead_data["collection_date"],
+        "Disponível"
+    )
+
+@medir_etapa("insert")
+def inserir_leads(leads):
+    # Insere vários leads num único INSERT multi-linha e devolve o conjunto de
+    # place_ids que realmente entraram (os conflitos não voltam no RETURNING).
+    if not leads:
+        return set()
+    from psycopg2.extras import execute_values
+    with conexao_db() as conn:
         cur = conn.cursor()
-        cur.execute("""
+        inseridos = execute_values(cur, """
     INSERT INTO leads (
         place_id, name, formatted_address, city, state, neighborhood,
         formatted_phone_number, latitude, longitude, image_urls,
         type, collected_at, status, last_status_update_at
     )
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+    VALUES %s
     ON CONFLICT (place_id) DO NOTHING
-""", (
-    lead_data["place_id"],
-    lead_data["name"],
-    lead_data["formatted_address"],
-    lead_data["city"],
-    lead_data["state"],
-    lead_data["neighborhood"],
-    lead_data["formatted_phone_number"],
-    lead_data["coordinates"]["lat"],
-    lead_data["coordinates"]["lng"],
-    lead_data["image_urls"],
-    lead_data["type"],
-    lead_data["collection_date"],
-    "Disponível"
-))
-
+    RETURNING place_id
+""", [_linha_lead(lead) for lead in leads],
+            template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())",
+            page_size=len(leads),
+            fetch=True)
         conn.commit()
         cur.close()
-        return True
-    except (Exception, Error) as error:
+    return {row[0] for row in inseridos}
+
+def insert_lead_to_db(lead_data):
+    try:
+        return lead_data["place_id"] in inserir_leads([lead_data])
+    except Exception as error:
         print(f"Erro ao inserir lead no PostgreSQL: {error}", file=sys.stderr)
         return False
-    finally:
-        if conn:
-            conn.close()
 
-def buscar_lugares(cidade, estado, termos, salvar_com_telefone, salvar_sem_telefone, bairro_filtro=None):
-    global contador_requisicoes
-    
-    existing_place_ids = get_existing_place_ids()
-    print(f"\n{len(existing_place_ids)} leads existentes carregados do Seu Banco de Dados.", file=sys.stderr)
+class EscritorLeads:
+    """Acumula leads e grava em lotes de `tamanho_lote` com um INSERT por lote."""
+
+    def __init__(self, tamanho_lote=50):
+        self.tamanho_lote = max(1, tamanho_lote)
+        self.pendentes = {}
+
+    def adicionar(self, lead_data):
+        # Retorna os leads efetivamente inseridos quando o lote é descarregado.
+        self.pendentes.setdefault(lead_data["place_id"], lead_data)
+        if len(self.pendentes) >= self.tamanho_lote:
+            return self.descarregar()
+        return []
+
+    def descarregar(self):
+        leads = list(self.pendentes.values())
+        self.pendentes = {}
+        try:
+            inseridos = inserir_leads(leads)
+        except Exception as error:
+            print(f"Erro ao inserir lote de {len(leads)} leads no PostgreSQL: {error}", file=sys.stderr)
+            return []
+        return [lead for lead in leads if lead["place_id"] in inseridos]
+
+class Checkpoint:
+    """Progresso da coleta (termos concluídos, página atual, next_page_token e
+    place_ids já processados), regravado atomicamente a cada página.
+    """
+
+    def __init__(self, caminho, assinatura):
+        self.caminho = caminho
+        self.assinatura = assinatura
+        self.termos_concluidos = []
+        self.termo_atual = None
+        self.pagina = 0
+        self.next_page_token = None
+        self.processados = set()
+
+    @classmethod
+    def carregar(cls, caminho, assinatura):
+        checkpoint = cls(caminho, assinatura)
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                estado = json.load(f)
+        except FileNotFoundError:
+            return checkpoint
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Checkpoint ilegível em {caminho}, começando do zero: {e}", file=sys.stderr)
+            return checkpoint
+
+        if estado.get("assinatura") != assinatura:
+            print("⚠️ Checkpoint é de outra busca (cidade/estado/termos/bairro), começando do zero.", file=sys.stderr)
+            return checkpoint
+
+        checkpoint.termos_concluidos = estado.get("termos_concluidos", [])
+        checkpoint.termo_atual = estado.get("termo_atual")
+        checkpoint.pagina = estado.get("pagina", 0)
+        checkpoint.next_page_token = estado.get("next_page_token")
+        checkpoint.processados = set(estado.get("processados", []))
+        print(f"Retomando do checkpoint: {len(checkpoint.termos_concluidos)} termos concluídos, "
+              f"{len(checkpoint.processados)} lugares já processados.", file=sys.stderr)
+        return checkpoint
+
+    @staticmethod
+    def caminho_padrao(assinatura):
+        # Um arquivo por busca: execuções de cidades/termos diferentes não
+        # disputam o mesmo checkpoint.
+        chave = hashlib.sha256(json.dumps(assinatura, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+        return os.path.join(CHECKPOINT_DIR_PADRAO, f"checkpoint_{chave[:12]}.json")
+
+    def posicao(self, termo):
+        # Página e token de onde o termo deve continuar.
+        if termo == self.termo_atual:
+            return self.pagina, self.next_page_token
+        return 0, None
+
+    def avancar(self, termo, pagina, next_page_token, place_ids):
+        self.termo_atual = termo
+        self.pagina = pagina
+        self.next_page_token = next_page_token
+        self.processados.update(place_ids)
+        self.salvar()
+
+    def concluir_termo(self, termo):
+        self.termos_concluidos.append(termo)
+        self.termo_atual = None
+        self.pagina = 0
+        self.next_page_token = None
+        self.salvar()
+
+    def salvar(self):
+        estado = {
+            "assinatura": self.assinatura,
+            "termos_concluidos": self.termos_concluidos,
+            "termo_atual": self.termo_atual,
+            "pagina": self.pagina,
+            "next_page_token": self.next_page_token,
+            "processados": sorted(self.processados),
+            "atualizado_em": datetime.now().isoformat(),
+        }
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        temporario = f"{self.caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(estado, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho)
+
+    def remover(self):
+        try:
+            os.remove(self.caminho)
+        except FileNotFoundError:
+            pass
+
+_lock_saida = threading.Lock()
+
+def emitir_ndjson(registro):
+    linha = json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n"
+    with _lock_saida:
+        sys.stdout.write(linha)
+        sys.stdout.flush()
+
+def detalhes_da_pagina(place_ids, executor=None, buscar=buscar_detalhes):
+    # Sem executor, busca um place_id por vez (modo original). Com executor,
+    # dispara os Details da página inteira em paralelo e devolve na mesma ordem.
+    if executor is None:
+        for place_id in place_ids:
+            if checar_limite():
+                return
+            yield place_id, buscar(place_id)
+        return
+    yield from zip(place_ids, executor.map(buscar, place_ids))
+
+class OrcamentoEsgotado(Exception):
+    pass
+
+def consultar_places(url, params, chave_cache, ler_cache=True):
+    # Uma chamada à API, servida do cache quando possível. Com params=None
+    # só o cache é consultado (retorna None na falta); com ler_cache=False
+    # vai direto à API (e a resposta nova substitui a do cache).
+    endpoint = endpoint_da_url(url)
+    with metricas.cronometrar("etapa_segundos", etapa=endpoint):
+        if cache is not None and ler_cache:
+            data = cache.obter(chave_cache)
+            metricas.incrementar("cache_total", endpoint=endpoint, resultado="falha" if data is None else "acerto")
+            if data is not None:
+                return data
+        if params is None:
+            return None
+
+        if not reservar_requisicao():
+            raise OrcamentoEsgotado()
+        try:
+            data = requisitar_places(url, params)
+        except requests.exceptions.RequestException:
+            liberar_requisicao()
+            raise
+
+        if cache is not None and data.get("status") in STATUS_CACHEAVEIS:
+            cache.guardar(chave_cache, data)
+        return data
+
+def consultar_pagina_busca(url, params, chave_cache, ler_cache=True):
+    # Uma página de text search: retorna (data, veio_do_cache). O
+    # next_page_token de uma página do cache é de uso único e expira em
+    # minutos, então quem pagina precisa saber de onde ele veio; com
+    # params=None só o cache é consultado.
+    if ler_cache:
+        data = consultar_places(url, None, chave_cache)
+        if data is not None:
+            return data, True
+    if params is None:
+        return None, False
+    return consultar_places(url, params, chave_cache, ler_cache=False), False
+
+def referencia_foto(detalhes):
+    fotos = detalhes.get("photos")
+    return fotos[0].get("photo_reference") if fotos else None
+
+def montar_lead(place_id, termo, detalhes, cidade, estado, foto_local=None):
+    telefone = detalhes.get("formatted_phone_number")
+    endereco = detalhes.get("formatted_address")
+    bairro = bairro_do_endereco(endereco, cidade, estado)
+    data_coleta = datetime.now().isoformat()
+
+    coordenadas = {"lat": None, "lng": None}
+    if "geometry" in detalhes and "location" in detalhes["geometry"]:
+        lat = detalhes["geometry"]["location"].get("lat")
+        lng = detalhes["geometry"]["location"].get("lng")
+        if lat is not None and lng is not None:
+            coordenadas = {"lat": lat, "lng": lng}
+
+    image_urls = []
+    photo_reference = referencia_foto(detalhes)
+    if foto_local:
+        image_urls.append(foto_local)
+    elif photo_reference:
+        # Com --fotos referencia, ou --fotos local cujo download falhou, fica
+        # o caminho que o backend resolve sem expor a chave da API.
+        if modo_fotos == "url":
+            image_urls.append(resolver_url_foto(photo_reference))
+        else:
+            image_urls.append(referencia_api(photo_reference))
+
+    return {
+        "place_id": place_id,
+        "name": detalhes.get("name"),
+        "formatted_address": endereco,
+        "city": cidade,
+        "state": estado,
+        "neighborhood": bairro,
+        "formatted_phone_number": telefone,
+        "type": termo,
+        "collection_date": data_coleta,
+        "coordinates": coordenadas,
+        "image_urls": image_urls
+    }
+
+class ColetaLeads:
+    """Estado de uma coleta: filtros, deduplicação, gravação em lote e contadores.
+
+    Com ao_inserir, cada lead gravado é entregue ao callback assim que o lote
+    é confirmado e não é acumulado em `leads`.
+    """
+
+    def __init__(self, cidade, estado, salvar_com_telefone, salvar_sem_telefone, concorrencia=1,
+                 tamanho_lote=50, indice=None, checkpoint=None, ao_inserir=None):
+        self.cidade = cidade
+        self.estado = estado
+        self.salvar_com_telefone = salvar_com_telefone
+        self.salvar_sem_telefone = salvar_sem_telefone
+        self.indice = indice if indice is not None else IndiceConsulta()
+        self.checkpoint = checkpoint
+        self.ao_inserir = ao_inserir
+        self.executor = ThreadPoolExecutor(max_workers=concorrencia) if concorrencia > 1 else None
+        # Pool próprio e limitado para as fotos, separado do pool do Details.
+        self.executor_fotos = (ThreadPoolExecutor(max_workers=fotos_concorrencia)
+                               if modo_fotos == "local" and acervo is not None else None)
+        self.escritor = EscritorLeads(tamanho_lote)
 
-    all_collected_leads = []
-    new_leads_count = 0
-    leads_with_phone = 0
-    leads_without_phone = 0
+        self.leads = []
+        self.requisicoes = 0
+        self.novos_leads = 0
+        self.com_telefone = 0
+        self.sem_telefone = 0
+        self.detalhes_economizados = 0
+        self.detalhes_complementares = 0
+        self.fotos_locais = 0
+        self.paginas_busca = 0
+        self.lugares_encontrados = set()
+        self.resumo = {}
+        _contexto.coleta = self
+
+    def _buscar_detalhes(self, place_id):
+        # Nas threads do executor a coleta também precisa estar no contexto.
+        _contexto.coleta = self
+        return buscar_detalhes(place_id)
+
+    def _completar_detalhes(self, place_id, detalhes):
+        # Com a máscara mínima, endereço/coordenadas/fotos vêm do text search.
+        # Só os leads aprovados que ficaram sem eles pagam o complemento.
+        if "formatted_address" in detalhes and "geometry" in detalhes:
+            return detalhes
+        self.detalhes_complementares += 1
+        metricas.incrementar("detalhes_complementares_total")
+        return {**detalhes, **buscar_detalhes(place_id, CAMPOS_COMPLEMENTARES)}
+
+    def _baixar_foto(self, referencia):
+        _contexto.coleta = self
+        return baixar_foto(referencia)
+
+    def _prefetch_fotos(self, aprovados):
+        # Baixa em paralelo a primeira foto dos leads aprovados na página,
+        # antes do INSERT, para que o lead já entre com a referência local.
+        if self.executor_fotos is None:
+            return {}
+        referencias = {place_id: referencia_foto(detalhes) for place_id, detalhes in aprovados}
+        pendentes = [(place_id, ref) for place_id, ref in referencias.items() if ref]
+        baixadas = self.executor_fotos.map(self._baixar_foto, [ref for _, ref in pendentes])
+        fotos = {place_id: local for (place_id, _), local in zip(pendentes, baixadas) if local}
+        self.fotos_locais += len(fotos)
+        return fotos
+
+    def registrar_inseridos(self, inseridos):
+        for lead_data in inseridos:
+            if self.ao_inserir is not None:
+                self.ao_inserir(lead_data)
+            else:
+                self.leads.append(lead_data)
+            self.novos_leads += 1
+            metricas.incrementar("leads_inseridos_total", termo=lead_data["type"])
+            if lead_data["formatted_phone_number"]:
+                self.com_telefone += 1
+            else:
+                self.sem_telefone += 1
+
+    def processar_resultados(self, termo, resultados):
+        # Filtra, busca Details e enfileira os leads de uma página de text
+        # search. Retorna os place_ids decididos (para o checkpoint).
+        with metricas.cronometrar("pagina_segundos", termo=termo):
+            return self._processar_resultados(termo, resultados)
+
+    def _processar_resultados(self, termo, resultados):
+        self.paginas_busca += 1
+        metricas.incrementar("paginas_busca_total", termo=termo)
+        metricas.incrementar("lugares_encontrados_total", len(resultados), termo=termo)
+        place_ids = [place["place_id"] for place in resultados]
+        self.lugares_encontrados.update(place_ids)
+        da_busca = {place["place_id"]: place for place in resultados}
+        existentes = self.indice.existentes(place_ids)
+        novos_place_ids = []
+        processados = []
+        for place in resultados:
+            if place["place_id"] in existentes:
+                continue
+            if self.checkpoint is not None and place["place_id"] in self.checkpoint.processados:
+                continue
+            # O resultado da busca já traz o nome: se ele não passa no filtro
+            # do termo, não vale gastar uma chamada de Details.
+            nome_busca = place.get("name")
+            if nome_busca and termo.lower() not in nome_busca.lower():
+                self.detalhes_economizados += 1
+                metricas.incrementar("detalhes_economizados_total", termo=termo)
+                processados.append(place["place_id"])
+                continue
+            novos_place_ids.append(place["place_id"])
+
+        aprovados = []
+        for place_id, detalhes in detalhes_da_pagina(novos_place_ids, self.executor, self._buscar_detalhes):
+            if detalhes:
+                processados.append(place_id)
+                detalhes = {**da_busca[place_id], **detalhes}
+            nome = detalhes.get("name")
+
+            if not nome or termo.lower() not in nome.lower():
+                continue
+
+            telefone = detalhes.get("formatted_phone_number")
+            if (self.salvar_com_telefone and telefone) or \
+               (self.salvar_sem_telefone and not telefone) or \
+               (self.salvar_com_telefone and self.salvar_sem_telefone):
+
+                aprovados.append((place_id, self._completar_detalhes(place_id, detalhes)))
+
+        fotos = self._prefetch_fotos(aprovados)
+        for place_id, detalhes in aprovados:
+            lead_data = montar_lead(place_id, termo, detalhes, self.cidade, self.estado, fotos.get(place_id))
+            self.indice.adicionar(place_id)
+            self.registrar_inseridos(self.escritor.adicionar(lead_data))
+
+        return processados
+
+    def descarregar(self):
+        self.registrar_inseridos(self.escritor.descarregar())
+
+    def finalizar(self):
+        global ultimo_resumo
+        self.descarregar()
+        if self.executor is not None:
+            self.executor.shutdown()
+        if self.executor_fotos is not None:
+            self.executor_fotos.shutdown()
+        _contexto.coleta = None
+
+        self.resumo = ultimo_resumo = _contexto.resumo = {
+            "novos_leads": self.novos_leads,
+            "com_telefone": self.com_telefone,
+            "sem_telefone": self.sem_telefone,
+            "detalhes_economizados": self.detalhes_economizados,
+            "detalhes_complementares": self.detalhes_complementares,
+            "fotos_locais": self.fotos_locais,
+            "paginas_busca": self.paginas_busca,
+            "lugares_encontrados": len(self.lugares_encontrados),
+            "requisicoes": self.requisicoes,
+            "cache_acertos": cache.acertos if cache is not None else 0,
+            "cache_falhas": cache.falhas if cache is not None else 0,
+        }
+
+        print(f"\n--- Resumo da Coleta ---", file=sys.stderr)
+        print(f"Total de novos leads coletados e inseridos: {self.novos_leads}", file=sys.stderr)
+        print(f"Leads com telefone: {self.com_telefone}", file=sys.stderr)
+        print(f"Leads sem telefone: {self.sem_telefone}", file=sys.stderr)
+        print(f"Chamadas de Details evitadas pelo pré-filtro: {self.detalhes_economizados}", file=sys.stderr)
+        if self.detalhes_complementares:
+            print(f"Details complementares (endereço/fotos fora da busca): {self.detalhes_complementares}", file=sys.stderr)
+        if self.executor_fotos is not None:
+            print(f"Fotos no acervo local: {self.fotos_locais}", file=sys.stderr)
+        if self.paginas_busca:
+            print(f"Lugares únicos por página de busca: {len(self.lugares_encontrados) / self.paginas_busca:.1f}", file=sys.stderr)
+        if cache is not None:
+            print(f"Cache: {cache.acertos} acertos, {cache.falhas} falhas", file=sys.stderr)
+        print(f"------------------------", file=sys.stderr)
+
+        return self.leads
+
+def buscar_lugares(cidade, estado, termos, salvar_com_telefone, salvar_sem_telefone, bairro_filtro=None, concorrencia=1, tamanho_lote=50, indice=None, checkpoint=None, ao_inserir=None):
+    coleta = ColetaLeads(cidade, estado, salvar_com_telefone, salvar_sem_telefone, concorrencia,
+                         tamanho_lote, indice, checkpoint, ao_inserir)
+    url = f"{GOOGLE_MAPS_BASE_URL}/place/textsearch/json"
 
     for termo in termos:
+        if checkpoint is not None and termo in checkpoint.termos_concluidos:
+            continue
+
         query = f"{termo} em {cidade}, {estado}"
         if bairro_filtro:
             query = f"{termo} em {bairro_filtro}, {cidade}, {estado}"
 
-        url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-        params = {
-            "query": query,
-            "key": API_KEY
-        }
-        pagetoken = None
+        pagina, pagetoken = checkpoint.posicao(termo) if checkpoint is not None else (0, None)
+        retomando = pagina > 0
+        esgotado = False
+        # Páginas do cache seguidas de uma que não está nele: o token guardado
+        # já morreu, então o termo é refeito da página 0 sem o cache (para ter
+        # tokens novos), sem reprocessar as páginas já vistas.
+        ler_cache, token_do_cache, paginas_processadas = True, False, 0
+        # Só conta como concluído o termo cuja paginação terminou (sem token
+        # ou 3 páginas); um erro no meio deixa o termo para a retomada.
+        concluido = False
 
-        for _ in range(3):
-            if checar_limite():
-                break
-            
+        while pagina < 3:
+            pagetoken_pagina = pagetoken
             if pagetoken:
                 params = {"pagetoken": pagetoken, "key": API_KEY}
-                time.sleep(2)
+            elif pagina == 0:
+                params = {"query": query, "key": API_KEY}
+            else:
+                params = None
 
+            # As páginas são cacheadas por (consulta, número da página), já que
+            # o next_page_token muda a cada chamada e expira em minutos.
             try:
-                res = requests.get(url, params=params)
-                res.raise_for_status()
-                data = res.json()
-                contador_requisicoes += 1
+                data, do_cache = consultar_pagina_busca(url, None if token_do_cache else params,
+                                                        CacheRespostas.chave("textsearch", query, pagina), ler_cache)
+            except OrcamentoEsgotado:
+                esgotado = True
+                break
             except requests.exceptions.RequestException as e:
+                if retomando:
+                    # O token salvo no checkpoint pode ter expirado: refaz o
+                    # termo do início; os lugares já processados são pulados.
+                    print(f"⚠️ next_page_token do checkpoint inválido, reiniciando \'{termo}\': {e}", file=sys.stderr)
+                    pagina, pagetoken, retomando = 0, None, False
+                    continue
                 print(f"⚠️ Erro na busca \'{query}\': {e}", file=sys.stderr)
                 break
+            if data is None:
+                if token_do_cache:
+                    paginas_processadas = pagina
+                    pagina, pagetoken, ler_cache, token_do_cache = 0, None, False, False
+                    continue
+                break
+
+            retomando = False
+            token_do_cache = do_cache
+            processados = []
+            if pagina >= paginas_processadas:
+                processados = coleta.processar_resultados(termo, data.get("results", []))
+
+            esgotado = checar_limite()
+            pagetoken = data.get("next_page_token")
+            if checkpoint is not None:
+                # Grava os leads pendentes antes do checkpoint, para que nenhum
+                # lugar marcado como processado fique só na memória. Se o
+                # orçamento acabou no meio da página, a retomada volta nela.
+                coleta.descarregar()
+                if esgotado:
+                    checkpoint.avancar(termo, pagina, pagetoken_pagina, processados)
+                else:
+                    checkpoint.avancar(termo, pagina + 1, pagetoken, processados)
+            pagina += 1
+            concluido = not pagetoken or pagina >= 3
+            if not pagetoken or esgotado:
+                break
+
+        if checkpoint is not None and concluido and not esgotado:
+            checkpoint.concluir_termo(termo)
+
+    leads = coleta.finalizar()
+    if checkpoint is not None and not checar_limite():
+        checkpoint.remover()
+    return leads
+
+def limites_da_regiao(cidade, estado, bairro=None):
+    # Caixa (sul, oeste, norte, leste) da cidade ou do bairro pela Geocoding API.
+    endereco = ", ".join(parte for parte in (bairro, cidade, estado, "Brasil") if parte)
+    url = f"{GOOGLE_MAPS_BASE_URL}/geocode/json"
+    params = {"address": endereco, "key": API_KEY}
+    data = consultar_places(url, params, CacheRespostas.chave("geocode", endereco))
+    resultados = data.get("results", [])
+    if not resultados:
+        return None
+    geometria = resultados[0]["geometry"]
+    caixa = geometria.get("bounds") or geometria["viewport"]
+    return (caixa["southwest"]["lat"], caixa["southwest"]["lng"],
+            caixa["northeast"]["lat"], caixa["northeast"]["lng"])
+
+def dividir_celula(celula, partes):
+    sul, oeste, norte, leste = celula
+    passo_lat = (norte - sul) / partes
+    passo_lng = (leste - oeste) / partes
+    for i in range(partes):
+        for j in range(partes):
+            yield (sul + i * passo_lat, oeste + j * passo_lng,
+                   sul + (i + 1) * passo_lat, oeste + (j + 1) * passo_lng)
+
+def raio_da_celula(celula):
+    # Metade da diagonal da célula, em metros (aproximação equiretangular).
+    sul, oeste, norte, leste = celula
+    dy = math.radians(norte - sul) * RAIO_TERRA_M
+    dx = math.radians(leste - oeste) * RAIO_TERRA_M * math.cos(math.radians((sul + norte) / 2))
+    return math.hypot(dx, dy) / 2
+
+def dentro_da_celula(celula, place):
+    local = place.get("geometry", {}).get("location")
+    if not local:
+        return True
+    sul, oeste, norte, leste = celula
+    return sul <= local["lat"] <= norte and oeste <= local["lng"] <= leste
+
+def varrer_cidade(cidade, estado, termos, salvar_com_telefone, salvar_sem_telefone, bairro_filtro=None, grade=3, profundidade_max=2, concorrencia=1, tamanho_lote=50, indice=None, checkpoint=None, ao_inserir=None):
+    # Divide a caixa da cidade em grade x grade células e faz uma busca com
+    # viés de localização por célula. Células que batem no teto de 60
+    # resultados da text search são subdivididas em 4, até profundidade_max.
+    coleta = ColetaLeads(cidade, estado, salvar_com_telefone, salvar_sem_telefone, concorrencia,
+                         tamanho_lote, indice, checkpoint, ao_inserir)
+    url = f"{GOOGLE_MAPS_BASE_URL}/place/textsearch/json"
+
+    try:
+        limites = limites_da_regiao(cidade, estado, bairro_filtro)
+    except (requests.exceptions.RequestException, OrcamentoEsgotado) as e:
+        print(f"⚠️ Erro ao geocodificar {cidade}/{estado}: {e}", file=sys.stderr)
+        limites = None
+    if limites is None:
+        print(f"⚠️ Região de {cidade}/{estado} não encontrada para a varredura.", file=sys.stderr)
+        return coleta.finalizar()
+
+    esgotado = False
+    for termo in termos:
+        if checkpoint is not None and termo in checkpoint.termos_concluidos:
+            continue
+
+        vistos = set()
+        falhou = False
+        pendentes = [(celula, 0) for celula in dividir_celula(limites, grade)]
+        while pendentes and not esgotado:
+            celula, profundidade = pendentes.pop()
+            centro = f"{(celula[0] + celula[2]) / 2:.6f},{(celula[1] + celula[3]) / 2:.6f}"
+            raio = min(RAIO_MAXIMO_BUSCA, int(raio_da_celula(celula)) + 1)
+            params_inicio = {"query": termo, "location": centro, "radius": raio, "key": API_KEY}
+            params = params_inicio
+            total = 0
+            # Mesmo cuidado de buscar_lugares com tokens vindos do cache.
+            ler_cache, token_do_cache, paginas_processadas = True, False, 0
+
+            pagina = 0
+            while pagina < 3:
+                try:
+                    data, do_cache = consultar_pagina_busca(
+                        url, None if token_do_cache else params,
+                        CacheRespostas.chave("textsearch", termo, centro, raio, pagina), ler_cache)
+                except OrcamentoEsgotado:
+                    esgotado = True
+                    break
+                except requests.exceptions.RequestException as e:
+                    print(f"⚠️ Erro na busca \'{termo}\' em {centro}: {e}", file=sys.stderr)
+                    falhou = True
+                    break
+                if data is None:
+                    if token_do_cache:
+                        paginas_processadas = pagina
+                        pagina, params, ler_cache, token_do_cache = 0, params_inicio, False, False
+                        continue
+                    break
+                token_do_cache = do_cache
+
+                # O viés de localização não restringe: descarta o que caiu fora
+                # da região e o que outra célula já trouxe.
+                if pagina >= paginas_processadas:
+                    resultados = data.get("results", [])
+                    total += len(resultados)
+                    novos = [place for place in resultados
+                             if place["place_id"] not in vistos and dentro_da_celula(limites, place)]
+                    vistos.update(place["place_id"] for place in resultados)
+                    processados = coleta.processar_resultados(termo, novos)
+                    if checkpoint is not None:
+                        coleta.descarregar()
+                        checkpoint.avancar(termo, 0, None, processados)
 
-            for place in data.get("results", []):
                 if checar_limite():
+                    esgotado = True
                     break
+                pagetoken = data.get("next_page_token")
+                if not pagetoken:
+                    break
+                params = {"pagetoken": pagetoken, "key": API_KEY}
+                pagina += 1
 
-                place_id = place["place_id"]
-                
-                if place_id in existing_place_ids:
-                    continue
+            if not esgotado and total >= RESULTADOS_MAXIMOS_BUSCA and profundidade < profundidade_max:
+                pendentes.extend((sub, profundidade + 1) for sub in dividir_celula(celula, 2))
 
-                detalhes = buscar_detalhes(place_id)
-                nome = detalhes.get("name")
-                
-                if not nome or termo.lower() not in nome.lower():
-                    continue
+        if esgotado:
+            break
+        # Uma célula com erro deixa o termo para a retomada (os lugares já
+        # processados são pulados).
+        if checkpoint is not None and not falhou:
+            checkpoint.concluir_termo(termo)
+
+    leads = coleta.finalizar()
+    if checkpoint is not None and not esgotado:
+        checkpoint.remover()
+    return leads
+
+def carregar_jobs(caminho, termos_padrao):
+    # Lista JSON de jobs: {"cidade", "estado", "termos"?, "bairro"? ou "bairros"?,
+    # "varredura"?}. Cada bairro de "bairros" vira um job próprio.
+    with open(caminho, encoding="utf-8") as f:
+        entradas = json.load(f)
+    jobs = []
+    for entrada in entradas:
+        bairros = entrada.get("bairros") or [entrada.get("bairro")]
+        for bairro in bairros:
+            jobs.append({
+                "cidade": entrada["cidade"],
+                "estado": entrada["estado"],
+                "termos": entrada.get("termos") or termos_padrao,
+                "bairro": bairro,
+                "varredura": entrada.get("varredura", False),
+            })
+    return jobs
+
+def chave_job(job):
+    return "|".join([job["cidade"], job["estado"], job["bairro"] or "", ",".join(job["termos"]),
+                     "varredura" if job["varredura"] else "termos"])
+
+def carregar_historico(caminho):
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Histórico de rendimento ilegível em {caminho}: {e}", file=sys.stderr)
+        return {}
+
+def salvar_historico(caminho, historico):
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(historico, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+def rendimento_historico(historico, job):
+    # Novos leads por requisição nas execuções anteriores. Jobs nunca
+    # executados vêm primeiro, para que ganhem um histórico.
+    registro = historico.get(chave_job(job))
+    if not registro or not registro.get("requisicoes"):
+        return float("inf")
+    return registro["novos_leads"] / registro["requisicoes"]
+
+def executar_jobs(jobs, workers, salvar_com_telefone, salvar_sem_telefone, caminho_historico=HISTORICO_JOBS_PADRAO,
+                  concorrencia=1, tamanho_lote=50, dedup="consulta", grade=3, profundidade_max=2, ao_inserir=None):
+    # Roda os jobs num pool de threads. Orçamento de requisições, limitador
+    # e pool do PostgreSQL são globais do processo, logo compartilhados.
+    historico = carregar_historico(caminho_historico)
+    jobs = sorted(jobs, key=lambda job: rendimento_historico(historico, job), reverse=True)
+    configurar_pool_db(workers)
+    lock_historico = threading.Lock()
 
-                telefone = detalhes.get("formatted_phone_number")
-                endereco = detalhes.get("formatted_address")
-                bairro = extrair_bairro(endereco) if endereco else ""
-                data_coleta = datetime.now().isoformat()
-                
-                coordenadas = {"lat": None, "lng": None}
-                if "geometry" in detalhes and "location" in detalhes["geometry"]:
-                    lat = detalhes["geometry"]["location"].get("lat")
-                    lng = detalhes["geometry"]["location"].get("lng")
-                    if lat is not None and lng is not None:
-                        coordenadas = {"lat": lat, "lng": lng}
-
-                image_urls = []
-                if "photos" in detalhes and detalhes["photos"]:
-                    photo = detalhes["photos"][0]
-                    photo_reference = photo.get("photo_reference")
-                    if photo_reference: image_urls.append(
-            f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference={photo_reference}&key={API_KEY}"
+    def executar(job):
+        print(f"Iniciando job {job['cidade']}/{job['estado']} (bairro: {job['bairro'] or '-'}) "
+              f"com termos: {job['termos']}", file=sys.stderr)
+        opcoes = dict(
+            cidade=job["cidade"],
+            estado=job["estado"],
+            termos=job["termos"],
+            salvar_com_telefone=salvar_com_telefone,
+            salvar_sem_telefone=salvar_sem_telefone,
+            bairro_filtro=job["bairro"],
+            concorrencia=concorrencia,
+            tamanho_lote=tamanho_lote,
+            indice=INDICES_DEDUP[dedup](),
+            ao_inserir=ao_inserir
         )
+        if job["varredura"]:
+            leads = varrer_cidade(grade=grade, profundidade_max=profundidade_max, **opcoes)
+        else:
+            leads = buscar_lugares(**opcoes)
+        resumo = _contexto.resumo
 
+        with lock_historico:
+            registro = historico.setdefault(chave_job(job), {"novos_leads": 0, "requisicoes": 0, "execucoes": 0})
+            registro["novos_leads"] += resumo["novos_leads"]
+            registro["requisicoes"] += resumo["requisicoes"]
+            registro["execucoes"] += 1
+        return leads, resumo
 
-                if (salvar_com_telefone and telefone) or \
-                   (salvar_sem_telefone and not telefone) or \
-                   (salvar_com_telefone and salvar_sem_telefone):
-                    
-                    lead_data = {
-                        "place_id": place_id,
-                        "name": nome,
-                        "formatted_address": endereco,
-                        "city": cidade,
-                        "state": estado,
-                        "neighborhood": bairro,
-                        "formatted_phone_number": telefone,
-                        "type": termo,
-                        "collection_date": data_coleta,
-                        "coordinates": coordenadas,
-                        "image_urls": image_urls
-                    }
-                    
-                    if insert_lead_to_db(lead_data):
-                        all_collected_leads.append(lead_data)
-                        new_leads_count += 1
-                        if telefone:
-                            leads_with_phone += 1
-                        else:
-                            leads_without_phone += 1
-
-                time.sleep(1.5)
+    todos_leads = []
+    resumos = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool_jobs:
+        for job, (leads, resumo) in zip(jobs, pool_jobs.map(executar, jobs)):
+            todos_leads.extend(leads)
+            resumos.append({"job": job, **resumo})
 
-            pagetoken = data.get("next_page_token")
-            if not pagetoken:
+    salvar_historico(caminho_historico, historico)
+    return todos_leads, resumos
+
+def selecionar_leads_antigos(dias, incluir_sem_telefone, apos_id, limite):
+    # Paginação por chave (id > último visto) em vez de OFFSET: cada lote
+    # custa o mesmo e as linhas já atualizadas não deslocam as seguintes.
+    with conexao_db() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+    SELECT id, place_id, formatted_address, formatted_phone_number, neighborhood
+    FROM leads
+    WHERE place_id IS NOT NULL
+      AND id > %s::uuid
+      AND (collected_at IS NULL
+           OR collected_at < NOW() - %s * INTERVAL '1 day'
+           OR (%s AND formatted_phone_number IS NULL))
+    ORDER BY id
+    LIMIT %s
+""", (apos_id, dias, incluir_sem_telefone, limite))
+        linhas = cur.fetchall()
+        cur.close()
+    return linhas
+
+def atualizar_leads(alterados, conferidos):
+    # alterados: (id, telefone, endereco, bairro) num único UPDATE ... FROM
+    # (VALUES ...); conferidos: ids sem mudança, que só renovam collected_at.
+    from psycopg2.extras import execute_values
+    with conexao_db() as conn:
+        cur = conn.cursor()
+        if alterados:
+            execute_values(cur, """
+    UPDATE leads SET
+        formatted_phone_number = v.telefone,
+        formatted_address = v.endereco,
+        neighborhood = v.bairro,
+        collected_at = NOW()
+    FROM (VALUES %s) AS v (id, telefone, endereco, bairro)
+    WHERE leads.id = v.id::uuid
+""", alterados, page_size=len(alterados))
+        if conferidos:
+            cur.execute("UPDATE leads SET collected_at = NOW() WHERE id = ANY(%s::uuid[])", (conferidos,))
+        conn.commit()
+        cur.close()
+
+def atualizar_leads_antigos(dias, incluir_sem_telefone=False, concorrencia=1, tamanho_lote=50):
+    # Reconfere no Details os leads coletados há mais de `dias` e grava só o
+    # que mudou. Telefone ou endereço ausentes na resposta não apagam o atual.
+    executor = ThreadPoolExecutor(max_workers=concorrencia) if concorrencia > 1 else None
+    buscar = functools.partial(consultar_detalhes, campos=CAMPOS_REFRESH, ler_cache=False)
+    resumo = {"conferidos": 0, "atualizados": 0, "telefones_novos": 0, "enderecos_alterados": 0,
+              "nao_encontrados": 0, "nao_conferidos": 0}
+    ultimo_id = "00000000-0000-0000-0000-000000000000"
+
+    try:
+        while not checar_limite():
+            lote = selecionar_leads_antigos(dias, incluir_sem_telefone, ultimo_id, tamanho_lote)
+            if not lote:
                 break
-    
-    print(f"\n--- Resumo da Coleta ---", file=sys.stderr)
-    print(f"Total de novos leads coletados e inseridos: {new_leads_count}", file=sys.stderr)
-    print(f"Leads com telefone: {leads_with_phone}", file=sys.stderr)
-    print(f"Leads sem telefone: {leads_without_phone}", file=sys.stderr)
-    print(f"------------------------", file=sys.stderr)
+            ultimo_id = lote[-1][0]
+            atuais = {linha[1]: linha for linha in lote}
+
+            alterados = []
+            conferidos = []
+            nao_encontrados = []
+            for place_id, (status, detalhes) in detalhes_da_pagina(list(atuais), executor, buscar):
+                lead_id, _, endereco, telefone, bairro = atuais[place_id]
+                if status in STATUS_LUGAR_INEXISTENTE:
+                    # Renova collected_at para não pagar de novo pelo mesmo
+                    # NOT_FOUND a cada refresh; o lead em si fica como está.
+                    resumo["nao_encontrados"] += 1
+                    nao_encontrados.append(lead_id)
+                    continue
+                if not detalhes:
+                    # Sem resposta (rede, limite) ou erro da API: fica para o
+                    # próximo refresh.
+                    resumo["nao_conferidos"] += 1
+                    continue
+                resumo["conferidos"] += 1
+                novo_telefone = detalhes.get("formatted_phone_number") or telefone
+                novo_endereco = detalhes.get("formatted_address") or endereco
+                if novo_telefone == telefone and novo_endereco == endereco:
+                    conferidos.append(lead_id)
+                    continue
+
+                if novo_telefone != telefone:
+                    resumo["telefones_novos"] += 1
+                if novo_endereco != endereco:
+                    resumo["enderecos_alterados"] += 1
+                    bairro = bairro_do_endereco(novo_endereco)
+                alterados.append((lead_id, novo_telefone, novo_endereco, bairro))
+
+            atualizar_leads(alterados, conferidos + nao_encontrados)
+            resumo["atualizados"] += len(alterados)
+            metricas.incrementar("refresh_leads_total", len(alterados), resultado="atualizado")
+            metricas.incrementar("refresh_leads_total", len(conferidos), resultado="sem_mudanca")
+            metricas.incrementar("refresh_leads_total", len(nao_encontrados), resultado="nao_encontrado")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    resumo["requisicoes"] = contador_requisicoes
+    print(f"\n--- Resumo do Refresh ---", file=sys.stderr)
+    print(f"Leads conferidos: {resumo['conferidos']} ({resumo['atualizados']} atualizados)", file=sys.stderr)
+    print(f"Telefones novos ou alterados: {resumo['telefones_novos']}", file=sys.stderr)
+    print(f"Endereços alterados: {resumo['enderecos_alterados']}", file=sys.stderr)
+    if resumo["nao_encontrados"]:
+        print(f"Não encontrados no Details (NOT_FOUND): {resumo['nao_encontrados']}", file=sys.stderr)
+    if resumo["nao_conferidos"]:
+        print(f"Sem resposta do Details: {resumo['nao_conferidos']}", file=sys.stderr)
+    print(f"-------------------------", file=sys.stderr)
+    return resumo
+
+def selecionar_enderecos(apos_id, limite):
+    # Mesma paginação por chave do --refresh, sem filtro de idade.
+    with conexao_db() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+    SELECT id, formatted_address, city, state, neighborhood
+    FROM leads
+    WHERE id > %s::uuid
+      AND formatted_address IS NOT NULL
+    ORDER BY id
+    LIMIT %s
+""", (apos_id, limite))
+        linhas = cur.fetchall()
+        cur.close()
+    return linhas
+
+def gravar_bairros(alterados):
+    # alterados: (id, bairro) num único UPDATE ... FROM (VALUES ...).
+    if not alterados:
+        return
+    from psycopg2.extras import execute_values
+    with conexao_db() as conn:
+        cur = conn.cursor()
+        execute_values(cur, """
+    UPDATE leads SET neighborhood = v.bairro
+    FROM (VALUES %s) AS v (id, bairro)
+    WHERE leads.id = v.id::uuid
+""", alterados, page_size=len(alterados))
+        conn.commit()
+        cur.close()
+
+def recalcular_bairros(tamanho_lote=1000):
+    # Refaz a coluna neighborhood da tabela inteira a partir de
+    # formatted_address, em lotes, sem chamar a API. Um bairro atual válido
+    # é mantido (só normalizado) quando o endereço não traz nenhum.
+    resumo = {"conferidos": 0, "alterados": 0, "sem_bairro": 0}
+    ultimo_id = "00000000-0000-0000-0000-000000000000"
+    while True:
+        lote = selecionar_enderecos(ultimo_id, tamanho_lote)
+        if not lote:
+            break
+        ultimo_id = lote[-1][0]
 
-    return all_collected_leads
+        alterados = []
+        for lead_id, endereco, cidade, estado, bairro_atual in lote:
+            novo = bairro_do_endereco(endereco, cidade, estado)
+            if not novo and bairro_valido(bairro_atual or "", cidade or ""):
+                novo = canonizar_bairro(" ".join(bairro_atual.split()), cidade, estado)
+            if not novo:
+                resumo["sem_bairro"] += 1
+            if novo != (bairro_atual or ""):
+                alterados.append((lead_id, novo))
+
+        gravar_bairros(alterados)
+        resumo["conferidos"] += len(lote)
+        resumo["alterados"] += len(alterados)
+        metricas.incrementar("bairros_recalculados_total", len(alterados), resultado="alterado")
+        metricas.incrementar("bairros_recalculados_total", len(lote) - len(alterados), resultado="sem_mudanca")
+        print(f"Bairros: {resumo['conferidos']} conferidos, {resumo['alterados']} alterados", file=sys.stderr)
+
+    memo = analisar_endereco.cache_info()
+    print(f"\n--- Resumo dos Bairros ---", file=sys.stderr)
+    print(f"Leads conferidos: {resumo['conferidos']} ({resumo['alterados']} alterados)", file=sys.stderr)
+    print(f"Sem bairro reconhecível: {resumo['sem_bairro']}", file=sys.stderr)
+    print(f"Cache de endereços: {memo.hits} acertos, {memo.misses} falhas", file=sys.stderr)
+    print(f"--------------------------", file=sys.stderr)
+    return resumo
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Busca de Leads em Google Places API.")
-    parser.add_argument("--cidade", required=True, help="Cidade para a busca.")
-    parser.add_argument("--estado", required=True, help="Estado (UF) para a busca.")
+    parser.add_argument("--cidade", help="Cidade para a busca.")
+    parser.add_argument("--estado", help="Estado (UF) para a busca.")
     parser.add_argument("--termos", nargs="+", default=["Condomínio","Hotel", "Edifício", "Prédio", "Residencial"], help="Termos de busca (ex: Condomínio, Hotel).")
     parser.add_argument("--bairro", help="Bairro opcional para filtrar a busca.")
     parser.add_argument("--com_telefone", action="store_true", help="Salvar leads com telefone.")
     parser.add_argument("--sem_telefone", action="store_true", help="Salvar leads sem telefone.")
+    parser.add_argument("--concorrencia", type=int, default=1, help="Buscas de Details em paralelo por página (1 = sequencial).")
+    parser.add_argument("--rps", type=float, default=10, help="Requisições por segundo à API (0 = sem limite).")
+    parser.add_argument("--rajada", type=int, default=10, help="Requisições permitidas em rajada acima do ritmo.")
+    parser.add_argument("--tentativas", type=int, default=5, help="Novas tentativas em 429/5xx/OVER_QUERY_LIMIT.")
+    parser.add_argument("--lote", type=int, default=50, help="Leads por INSERT em lote no PostgreSQL.")
+    parser.add_argument("--campos", choices=sorted(NIVEIS_CAMPOS), default="minimo", help="Máscara do Details: minimo (nome e telefone, o resto vem da busca) ou completo.")
+    parser.add_argument("--fotos", choices=["url", "referencia", "local"], default="url", help="Grava a URL da foto (com a chave da API), só o photo_reference (servido pelo backend em /lead-photos/ref/<ref>) ou baixa a miniatura para o acervo local.")
+    parser.add_argument("--fotos-dir", default=ACERVO_FOTOS_PADRAO, help="Diretório do acervo de fotos com --fotos local (servido em /lead-photos).")
+    parser.add_argument("--fotos-concorrencia", type=int, default=4, help="Downloads de fotos em paralelo com --fotos local.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR_PADRAO, help="Diretório do cache local de respostas da API.")
+    parser.add_argument("--no-cache", action="store_true", help="Desliga o cache local de respostas.")
+    parser.add_argument("--cache-ttl-dias", type=float, default=7, help="Validade das respostas em cache, em dias.")
+    parser.add_argument("--cache-max-entradas", type=int, default=50000, help="Máximo de respostas mantidas no cache (LRU).")
+    parser.add_argument("--checkpoint", help="Arquivo de checkpoint da coleta (padrão: backup/checkpoint_<hash da busca>.json com --resume).")
+    parser.add_argument("--resume", action="store_true", help="Grava checkpoint e retoma a coleta a partir dele, se existir.")
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json", help="json: lista única ao final; ndjson: um lead por linha assim que gravado, seguido do resumo.")
+    parser.add_argument("--varredura", action="store_true", help="Varre a cidade em grade com buscas por célula para passar do teto de 60 resultados.")
+    parser.add_argument("--grade", type=int, default=3, help="Células por lado na grade inicial da varredura.")
+    parser.add_argument("--profundidade-max", type=int, default=2, help="Subdivisões máximas de uma célula saturada na varredura.")
+    parser.add_argument("--jobs", help="Arquivo JSON com vários jobs (cidade/estado/termos/bairros) num só processo.")
+    parser.add_argument("--workers", type=int, default=2, help="Jobs executados em paralelo com --jobs.")
+    parser.add_argument("--historico-jobs", default=HISTORICO_JOBS_PADRAO, help="Arquivo com o rendimento histórico (leads novos por requisição) de cada job.")
+    parser.add_argument("--metricas-json", help="Grava as métricas da execução em JSON neste arquivo ('-' para stderr).")
+    parser.add_argument("--metricas-prometheus", help="Grava as métricas no formato texto do Prometheus neste arquivo.")
+    parser.add_argument("--refresh", action="store_true", help="Em vez de buscar leads novos, reconfere telefone e endereço dos leads antigos.")
+    parser.add_argument("--refresh-dias", type=float, default=30, help="Idade mínima (collected_at), em dias, dos leads reconferidos com --refresh.")
+    parser.add_argument("--refresh-sem-telefone", action="store_true", help="Com --refresh, reconfere também os leads sem telefone, de qualquer idade.")
+    parser.add_argument("--backfill-bairros", action="store_true", help="Em vez de buscar leads, recalcula a coluna neighborhood da tabela inteira a partir dos endereços (sem chamar a API).")
+    parser.add_argument("--backfill-lote", type=int, default=1000, help="Leads lidos e atualizados por lote com --backfill-bairros.")
+    parser.add_argument("--dedup", choices=sorted(INDICES_DEDUP), default="consulta", help="Estratégia de deduplicação: consulta por página ou tabela inteira em memória.")
 
     args = parser.parse_args()
 
+    if not args.refresh and not args.backfill_bairros and not args.jobs and not (args.cidade and args.estado):
+        parser.error("--cidade e --estado são obrigatórios sem --jobs.")
+
+    validar_configuracao()
+
     if not args.com_telefone and not args.sem_telefone:
         args.com_telefone = True
         args.sem_telefone = True
 
-    print(f"Iniciando busca para {args.cidade}/{args.estado} com termos: {args.termos}", file=sys.stderr)
+    configurar_ritmo(args.rps, args.rajada, args.tentativas)
+    configurar_detalhes(args.campos, args.fotos)
+    configurar_bairros(True)
+    if args.fotos == "local":
+        configurar_acervo(args.fotos_dir, args.fotos_concorrencia)
+    if not args.no_cache:
+        configurar_cache(args.cache_dir, args.cache_ttl_dias, args.cache_max_entradas)
 
-    collected_leads = buscar_lugares(
-        cidade=args.cidade,
-        estado=args.estado,
-        termos=args.termos,
-        salvar_com_telefone=args.com_telefone,
-        salvar_sem_telefone=args.sem_telefone,
-        bairro_filtro=args.bairro
-    )
+    ao_inserir = (lambda lead: emitir_ndjson({"tipo": "lead", "lead": lead})) if args.format == "ndjson" else None
+
+    if args.backfill_bairros:
+        print("Recalculando os bairros de todos os leads a partir dos endereços.", file=sys.stderr)
+        collected_leads = ultimo_resumo = recalcular_bairros(args.backfill_lote)
+    elif args.refresh:
+        print(f"Reconferindo leads com mais de {args.refresh_dias:g} dias.", file=sys.stderr)
+        ultimo_resumo = atualizar_leads_antigos(
+            args.refresh_dias,
+            incluir_sem_telefone=args.refresh_sem_telefone,
+            concorrencia=args.concorrencia,
+            tamanho_lote=args.lote
+        )
+        collected_leads = ultimo_resumo
+    elif args.jobs:
+        jobs = carregar_jobs(args.jobs, args.termos)
+        print(f"Iniciando {len(jobs)} jobs com {args.workers} workers e orçamento de {LIMITE_REQUISICOES} requisições.", file=sys.stderr)
+        collected_leads, resumos = executar_jobs(
+            jobs,
+            workers=args.workers,
+            salvar_com_telefone=args.com_telefone,
+            salvar_sem_telefone=args.sem_telefone,
+            caminho_historico=args.historico_jobs,
+            concorrencia=args.concorrencia,
+            tamanho_lote=args.lote,
+            dedup=args.dedup,
+            grade=args.grade,
+            profundidade_max=args.profundidade_max,
+            ao_inserir=ao_inserir
+        )
+        ultimo_resumo = {
+            "jobs": len(resumos),
+            "novos_leads": sum(resumo["novos_leads"] for resumo in resumos),
+            "requisicoes": contador_requisicoes,
+        }
+        if args.format == "ndjson":
+            for resumo in resumos:
+                emitir_ndjson({"tipo": "resumo_job", **resumo})
+    else:
+        assinatura = {"cidade": args.cidade, "estado": args.estado, "termos": args.termos, "bairro": args.bairro,
+                      "varredura": args.varredura}
+        # Sem --resume/--checkpoint a coleta não grava checkpoint nenhum.
+        checkpoint = None
+        if args.resume or args.checkpoint:
+            caminho_checkpoint = args.checkpoint or Checkpoint.caminho_padrao(assinatura)
+            if args.resume:
+                checkpoint = Checkpoint.carregar(caminho_checkpoint, assinatura)
+            else:
+                checkpoint = Checkpoint(caminho_checkpoint, assinatura)
+
+        print(f"Iniciando busca para {args.cidade}/{args.estado} com termos: {args.termos}", file=sys.stderr)
+
+        opcoes = dict(
+            cidade=args.cidade,
+            estado=args.estado,
+            termos=args.termos,
+            salvar_com_telefone=args.com_telefone,
+            salvar_sem_telefone=args.sem_telefone,
+            bairro_filtro=args.bairro,
+            concorrencia=args.concorrencia,
+            tamanho_lote=args.lote,
+            indice=INDICES_DEDUP[args.dedup](),
+            checkpoint=checkpoint,
+            ao_inserir=ao_inserir
+        )
+        if args.varredura:
+            collected_leads = varrer_cidade(grade=args.grade, profundidade_max=args.profundidade_max, **opcoes)
+        else:
+            collected_leads = buscar_lugares(**opcoes)
+
+    exportar_metricas(args.metricas_json, args.metricas_prometheus)
+    fechar_pool_db()
+    if cache is not None:
+        cache.fechar()
 
-    print(json.dumps(collected_leads, ensure_ascii=False, indent=4))
+    if args.format == "ndjson":
+        emitir_ndjson({"tipo": "resumo", **ultimo_resumo})
+    else:
+        print(json.dumps(collected_leads, ensure_ascii=False, indent=4))
 
-    sys.exit(0)
\ No newline at end of file
+    sys.exit(0)
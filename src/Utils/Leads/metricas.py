@@ -0,0 +1,114 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Metricas:
+    """Contadores, gauges e histogramas com rótulos, seguros entre threads.
+
+    Exporta em JSON (para_dict) ou no formato texto do Prometheus
+    (para_prometheus). Cada registro custa um lock e algumas operações de
+    dicionário, então pode envolver chamadas de rede e de banco sem peso.
+    """
+
+    LIMITES_HISTOGRAMA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, prefixo="ecolote_leads"):
+        self.prefixo = prefixo
+        self.contadores = {}
+        self.gauges = {}
+        self.histogramas = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _chave(nome, rotulos):
+        return nome, tuple(sorted((chave, str(valor)) for chave, valor in rotulos.items()))
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = self._chave(nome, rotulos)
+        with self.lock:
+            self.contadores[chave] = self.contadores.get(chave, 0) + valor
+
+    def definir(self, nome, valor, **rotulos):
+        with self.lock:
+            self.gauges[self._chave(nome, rotulos)] = valor
+
+    def observar(self, nome, valor, **rotulos):
+        chave = self._chave(nome, rotulos)
+        with self.lock:
+            histograma = self.histogramas.get(chave)
+            if histograma is None:
+                histograma = self.histogramas[chave] = {
+                    "baldes": [0] * len(self.LIMITES_HISTOGRAMA), "soma": 0.0, "total": 0
+                }
+            for i, limite in enumerate(self.LIMITES_HISTOGRAMA):
+                if valor <= limite:
+                    histograma["baldes"][i] += 1
+                    break
+            histograma["soma"] += valor
+            histograma["total"] += 1
+
+    @contextmanager
+    def cronometrar(self, nome, **rotulos):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, time.perf_counter() - inicio, **rotulos)
+
+    def para_dict(self):
+        def serie(chave, valor):
+            return {"nome": chave[0], "rotulos": dict(chave[1]), "valor": valor}
+
+        with self.lock:
+            histogramas = []
+            for (nome, rotulos), histograma in sorted(self.histogramas.items()):
+                histogramas.append({
+                    "nome": nome,
+                    "rotulos": dict(rotulos),
+                    "total": histograma["total"],
+                    "soma": round(histograma["soma"], 6),
+                    "baldes": dict(zip([str(limite) for limite in self.LIMITES_HISTOGRAMA], histograma["baldes"])),
+                })
+            return {
+                "contadores": [serie(chave, valor) for chave, valor in sorted(self.contadores.items())],
+                "gauges": [serie(chave, valor) for chave, valor in sorted(self.gauges.items())],
+                "histogramas": histogramas,
+            }
+
+    def para_prometheus(self):
+        def rotulos_texto(rotulos, extra=()):
+            pares = list(rotulos) + list(extra)
+            if not pares:
+                return ""
+            conteudo = ",".join(
+                f'{chave}="{valor.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                for chave, valor in pares
+            )
+            return "{" + conteudo + "}"
+
+        linhas = []
+        with self.lock:
+            for tipo, series in (("counter", self.contadores), ("gauge", self.gauges)):
+                vistos = set()
+                for (nome, rotulos), valor in sorted(series.items()):
+                    metrica = f"{self.prefixo}_{nome}"
+                    if metrica not in vistos:
+                        linhas.append(f"# TYPE {metrica} {tipo}")
+                        vistos.add(metrica)
+                    linhas.append(f"{metrica}{rotulos_texto(rotulos)} {valor}")
+
+            vistos = set()
+            for (nome, rotulos), histograma in sorted(self.histogramas.items()):
+                metrica = f"{self.prefixo}_{nome}"
+                if metrica not in vistos:
+                    linhas.append(f"# TYPE {metrica} histogram")
+                    vistos.add(metrica)
+                acumulado = 0
+                for limite, quantidade in zip(self.LIMITES_HISTOGRAMA, histograma["baldes"]):
+                    acumulado += quantidade
+                    linhas.append(f"{metrica}_bucket{rotulos_texto(rotulos, [('le', str(limite))])} {acumulado}")
+                linhas.append(f"{metrica}_bucket{rotulos_texto(rotulos, [('le', '+Inf')])} {histograma['total']}")
+                linhas.append(f"{metrica}_sum{rotulos_texto(rotulos)} {histograma['soma']}")
+                linhas.append(f"{metrica}_count{rotulos_texto(rotulos)} {histograma['total']}")
+        return "\n".join(linhas) + "\n"
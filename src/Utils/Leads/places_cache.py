@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class CacheRespostas:
+    """Cache em disco (SQLite) das respostas da Places API.
+
+    Cada entrada expira após `ttl_segundos`. Quando o total passa de
+    `max_entradas`, as menos acessadas recentemente são removidas (LRU).
+    """
+
+    INTERVALO_DESPEJO = 100
+
+    def __init__(self, diretorio, ttl_segundos, max_entradas):
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminho = os.path.join(diretorio, "places_cache.sqlite3")
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self.acertos = 0
+        self.falhas = 0
+        self._escritas = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.caminho, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS respostas (
+                chave       TEXT PRIMARY KEY,
+                valor       TEXT NOT NULL,
+                criado_em   REAL NOT NULL,
+                acessado_em REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_respostas_acessado_em ON respostas (acessado_em)")
+
+    @staticmethod
+    def chave(*partes):
+        return hashlib.sha256(json.dumps(partes, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def obter(self, chave):
+        agora = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT valor, criado_em FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if row is None or agora - row[1] > self.ttl_segundos:
+                if row is not None:
+                    self.conn.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+                self.falhas += 1
+                return None
+            self.conn.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (agora, chave))
+            self.acertos += 1
+            return json.loads(row[0])
+
+    def guardar(self, chave, valor):
+        agora = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO respostas (chave, valor, criado_em, acessado_em) VALUES (?, ?, ?, ?)",
+                (chave, json.dumps(valor, ensure_ascii=False), agora, agora)
+            )
+            self._escritas += 1
+            if self._escritas % self.INTERVALO_DESPEJO == 0:
+                self._despejar()
+
+    def _despejar(self):
+        self.conn.execute("DELETE FROM respostas WHERE criado_em < ?", (time.time() - self.ttl_segundos,))
+        excesso = self.conn.execute("SELECT COUNT(*) FROM respostas").fetchone()[0] - self.max_entradas
+        if excesso > 0:
+            self.conn.execute(
+                "DELETE FROM respostas WHERE chave IN "
+                "(SELECT chave FROM respostas ORDER BY acessado_em ASC LIMIT ?)",
+                (excesso,)
+            )
+
+    def fechar(self):
+        with self.lock:
+            self._despejar()
+            self.conn.close()
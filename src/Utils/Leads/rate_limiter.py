@@ -0,0 +1,48 @@
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """Limitador de taxa (requisições por segundo + rajada) seguro entre threads.
+
+    Com taxa <= 0 o limitador fica desligado e adquirir() retorna na hora.
+    """
+
+    def __init__(self, taxa, rajada=1):
+        self.taxa = float(taxa)
+        self.capacidade = max(1, int(rajada))
+        self.tokens = float(self.capacidade)
+        self.ultimo = time.monotonic()
+        self.lock = threading.Lock()
+
+    def adquirir(self):
+        """Bloqueia até haver um token disponível. Retorna o tempo esperado em segundos."""
+        if self.taxa <= 0:
+            return 0.0
+        esperado = 0.0
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self.ultimo) * self.taxa)
+                self.ultimo = agora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return esperado
+                falta = (1 - self.tokens) / self.taxa
+            time.sleep(falta)
+            esperado += falta
+
+
+class Backoff:
+    """Esperas exponenciais com jitter: metade fixa, metade aleatória em cada tentativa."""
+
+    def __init__(self, base=0.5, maximo=30.0, tentativas=5):
+        self.base = base
+        self.maximo = maximo
+        self.tentativas = tentativas
+
+    def esperas(self):
+        for tentativa in range(self.tentativas):
+            teto = min(self.maximo, self.base * (2 ** tentativa))
+            yield teto / 2 + random.uniform(0, teto / 2)
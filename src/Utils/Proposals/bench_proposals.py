@@ -0,0 +1,234 @@
+"""Benchmark do generate_proposal.
+
+Mede a partida a frio (interpretador novo: import do generate_proposal,
+import do layout com reportlab e estilos, primeira proposta), a latência a quente por fase,
+PDFs por segundo por núcleo, tamanho da saída e pico de memória. O cache de
+PDFs fica desligado para que toda proposta seja renderizada de verdade.
+
+Uso:
+    python bench_proposals.py -n 200 --variantes
+    python bench_proposals.py --modo merge completo --processos 4
+    python bench_proposals.py --perfil render.prof
+"""
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+os.environ["PROPOSAL_CACHE_MAX_MB"] = "0"
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+SCRIPT_FRIO = """
+import json, sys, time
+inicio = time.perf_counter()
+import generate_proposal as g
+modulo_ms = (time.perf_counter() - inicio) * 1000
+inicio = time.perf_counter()
+g.layout()
+reportlab_ms = (time.perf_counter() - inicio) * 1000
+inicio = time.perf_counter()
+g.render_proposal_bytes(g.prepare_data({}))
+primeira_ms = (time.perf_counter() - inicio) * 1000
+inicio = time.perf_counter()
+g.render_proposal_bytes(g.prepare_data({}))
+segunda_ms = (time.perf_counter() - inicio) * 1000
+import proposal_assets
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+inicio = time.perf_counter()
+ImageReader(proposal_assets.LOGO_PATH).getRGBData()
+logo_ms = (time.perf_counter() - inicio) * 1000
+inicio = time.perf_counter()
+proposal_assets.image_flowable(proposal_assets.LOGO_PATH, 1.5 * cm, 1.5 * cm)
+logo_preparado_ms = (time.perf_counter() - inicio) * 1000
+print(json.dumps({"import_reportlab_ms": reportlab_ms, "import_modulo_ms": modulo_ms,
+                  "primeira_proposta_ms": primeira_ms, "segunda_proposta_ms": segunda_ms,
+                  "decodificar_logo_ms": logo_ms, "logo_preparado_ms": logo_preparado_ms}))
+"""
+
+
+class Cronometro:
+    def __init__(self):
+        self.amostras = {}
+        self.lock = threading.Lock()
+
+    def envolver(self, etapa, funcao):
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                duracao = time.perf_counter() - inicio
+                with self.lock:
+                    self.amostras.setdefault(etapa, []).append(duracao)
+        return medida
+
+    def percentis(self):
+        resultado = {}
+        for etapa, amostras in sorted(self.amostras.items()):
+            ordenadas = sorted(amostras)
+            resultado[etapa] = {
+                "n": len(ordenadas),
+                "p50_ms": ordenadas[int(0.50 * (len(ordenadas) - 1))] * 1000,
+                "p95_ms": ordenadas[int(0.95 * (len(ordenadas) - 1))] * 1000,
+            }
+        return resultado
+
+
+def pico_rss_mb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def medir_frio(repeticoes):
+    # Cada amostra é um interpretador novo, como no exec por proposta.
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        saida = subprocess.run([sys.executable, "-c", SCRIPT_FRIO], cwd=DIRETORIO, env=os.environ,
+                               capture_output=True, text=True, check=True).stdout
+        amostra = json.loads(saida)
+        amostra["processo_ms"] = (time.perf_counter() - inicio) * 1000
+        amostras.append(amostra)
+    return {chave: sorted(a[chave] for a in amostras)[len(amostras) // 2] for chave in amostras[0]}
+
+
+def payloads(quantidade, variantes, semente=42):
+    # Sem variantes, sempre os dados de exemplo; com variantes, nomes e
+    # contas aleatórios (os valores financeiros saem da calculadora).
+    rng = random.Random(semente)
+    for i in range(quantidade):
+        if not variantes:
+            yield {}
+            continue
+        yield {
+            "client_name": f"Condomínio {rng.choice(['Solar', 'Mirante', 'Jardim', 'Atlântico'])} {i}",
+            "proposal_number": f"PRO-BENCH-{i:05d}",
+            "current_light_bill_value": round(rng.uniform(150, 6000), 2),
+        }
+
+
+def medir_quente(g, quantidade, variantes, modo, perfil=None):
+    cronometro = Cronometro()
+    layout = g.layout()
+    originais = (layout.build_dynamic_story, layout.build_static_story, layout.build_document, g.static_pages_reader)
+    layout.build_dynamic_story = cronometro.envolver("story_pagina1", originais[0])
+    layout.build_static_story = cronometro.envolver("story_estaticas", originais[1])
+    layout.build_document = cronometro.envolver("doc_build", originais[2])
+    g.static_pages_reader = cronometro.envolver("paginas_estaticas", originais[3])
+    g.MERGE_STATIC_PAGES = modo == "merge"
+
+    dados = [g.prepare_data(payload) for payload in payloads(quantidade, variantes)]
+    g.render_proposal_bytes(dados[0])  # aquece caches (páginas estáticas, fontes)
+    cronometro.amostras.clear()
+
+    renderizar = cronometro.envolver("total", g.render_proposal_bytes)
+    tamanhos = []
+    profiler = cProfile.Profile() if perfil else None
+    try:
+        if profiler:
+            profiler.enable()
+        inicio = time.perf_counter()
+        for data in dados:
+            tamanhos.append(len(renderizar(data)))
+        duracao = time.perf_counter() - inicio
+    finally:
+        if profiler:
+            profiler.disable()
+        (layout.build_dynamic_story, layout.build_static_story, layout.build_document,
+         g.static_pages_reader) = originais
+        g.MERGE_STATIC_PAGES = True
+
+    if profiler:
+        profiler.dump_stats(perfil)
+        texto = io.StringIO()
+        pstats.Stats(profiler, stream=texto).sort_stats("cumulative").print_stats(15)
+        print(texto.getvalue(), file=sys.stderr)
+
+    return {
+        "modo": modo,
+        "propostas": quantidade,
+        "segundos": duracao,
+        "pdfs_por_segundo_por_nucleo": quantidade / duracao if duracao else 0.0,
+        "tamanho_medio_kb": sum(tamanhos) / len(tamanhos) / 1024,
+        "etapas": cronometro.percentis(),
+    }
+
+
+def medir_lote(g, quantidade, variantes, processos):
+    linhas = "".join(json.dumps({"id": i, "data": payload}) + "\n"
+                     for i, payload in enumerate(payloads(quantidade, variantes)))
+    with tempfile.TemporaryDirectory() as destino:
+        inicio = time.perf_counter()
+        g.run_batch(io.StringIO(linhas), out_dir=destino, processes=processos, output=io.StringIO())
+        duracao = time.perf_counter() - inicio
+    return {
+        "processos": processos,
+        "propostas": quantidade,
+        "segundos": duracao,
+        "pdfs_por_segundo": quantidade / duracao if duracao else 0.0,
+        "pdfs_por_segundo_por_nucleo": quantidade / duracao / processos if duracao else 0.0,
+    }
+
+
+def imprimir(resultado):
+    frio = resultado["frio"]
+    print("\n=== partida a frio (mediana) ===")
+    print(f"processo inteiro: {frio['processo_ms']:.0f}ms | import do generate_proposal: {frio['import_modulo_ms']:.0f}ms | "
+          f"import do layout (reportlab + estilos): {frio['import_reportlab_ms']:.0f}ms")
+    print(f"primeira proposta: {frio['primeira_proposta_ms']:.1f}ms | segunda: {frio['segunda_proposta_ms']:.1f}ms | "
+          f"decodificar o logo original: {frio['decodificar_logo_ms']:.1f}ms | "
+          f"logo preparado (cache em disco): {frio['logo_preparado_ms']:.1f}ms")
+    for quente in resultado["quente"]:
+        print(f"\n=== a quente, modo {quente['modo']} ===")
+        print(f"{quente['propostas']} propostas em {quente['segundos']:.2f}s "
+              f"({quente['pdfs_por_segundo_por_nucleo']:.1f} PDFs/s por núcleo), "
+              f"{quente['tamanho_medio_kb']:.1f} KB em média")
+        for etapa, valores in quente["etapas"].items():
+            print(f"  {etapa:<18} n={valores['n']:<5} p50={valores['p50_ms']:.1f}ms p95={valores['p95_ms']:.1f}ms")
+    for lote in resultado["lotes"]:
+        print(f"\n=== lote com {lote['processos']} processos ===")
+        print(f"{lote['propostas']} propostas em {lote['segundos']:.2f}s ({lote['pdfs_por_segundo']:.1f} PDFs/s, "
+              f"{lote['pdfs_por_segundo_por_nucleo']:.1f} por núcleo)")
+    print(f"\npico de RSS: {resultado['pico_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da geração de propostas em PDF.")
+    parser.add_argument("-n", "--propostas", type=int, default=100, help="Propostas renderizadas em cada medição a quente.")
+    parser.add_argument("--variantes", action="store_true", help="Usa dados aleatórios em vez de repetir os dados de exemplo.")
+    parser.add_argument("--frio", type=int, default=3, help="Interpretadores novos medidos na partida a frio.")
+    parser.add_argument("--modo", nargs="+", choices=["merge", "completo"], default=["merge", "completo"],
+                        help="merge: páginas estáticas pré-renderizadas; completo: documento inteiro a cada proposta.")
+    parser.add_argument("--processos", type=int, nargs="*", default=[], help="Mede também o modo --batch com estes números de processos.")
+    parser.add_argument("--perfil", help="Grava um dump do cProfile de uma passada extra (no primeiro --modo) neste arquivo.")
+    parser.add_argument("--json", dest="saida_json", help="Grava os resultados neste arquivo JSON.")
+    args = parser.parse_args()
+
+    resultado = {"frio": medir_frio(args.frio)}
+
+    sys.path.insert(0, DIRETORIO)
+    import generate_proposal as g
+
+    resultado["quente"] = [medir_quente(g, args.propostas, args.variantes, modo) for modo in args.modo]
+    if args.perfil:
+        # Passada à parte: o cProfile distorce os tempos das medições acima.
+        medir_quente(g, args.propostas, args.variantes, args.modo[0], args.perfil)
+    resultado["lotes"] = [medir_lote(g, args.propostas, args.variantes, processos) for processos in args.processos]
+    resultado["pico_rss_mb"] = pico_rss_mb()
+
+    imprimir(resultado)
+
+    if args.saida_json:
+        with open(args.saida_json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,149 @@
+import json
+import sys
+
+import numpy as np
+
+# Parâmetros do solarCalculator (docs/☀️  — Manual_Calculadora.md).
+TARIFA_PADRAO = 1.03            # R$/kWh
+IRRADIACAO_PADRAO = 5.3         # kWh/m²/dia (Iguaracy - PE)
+CONSUMO_MINIMO_KWH = 260
+DIAS_MES = 30
+# Fator de desempenho do sistema, calibrado no exemplo do manual
+# (486 kWh -> 4,09 kWp necessários -> 523 kWh gerados com 4,4 kWp).
+FATOR_DESEMPENHO = 0.7476
+POTENCIA_MODULO_KWP = 0.55      # WEG 550W
+AREA_MODULO_M2 = 2
+AREA_LOTE_M2 = 35
+VALOR_M2_EXCEDENTE = 174
+# O manual não descreve o custo do kit; o valor por kWp reproduz o custo
+# do exemplo (R$ 25.540,00 para 4,4 kWp).
+CUSTO_POR_KWP = 25540 / 4.4
+DESCONTO = 2000
+TAXA_ASSOCIACAO = 85.37         # R$/mês por lote de 35 m²
+
+JUROS_MENSAIS = 0.0156
+PRAZOS = np.array([36, 48, 60, 72, 84])
+REAJUSTE_TARIFA_ANUAL = 0.08
+DEGRADACAO_ANUAL = 0.007
+HORIZONTE_PAYBACK_ANOS = 25
+
+
+def parcelas(valor, prazos=PRAZOS, juros=JUROS_MENSAIS):
+    """Parcela fixa (juros compostos) de cada valor em cada prazo: shape (n, len(prazos))."""
+    valor = np.asarray(valor, dtype=float)[..., np.newaxis]
+    fator = (1 + juros) ** -np.asarray(prazos, dtype=float)
+    return valor * juros / (1 - fator)
+
+
+def calcular(contas, tarifas=TARIFA_PADRAO, irradiacao=IRRADIACAO_PADRAO):
+    """Simula o projeto para um array de contas de luz de uma só vez.
+
+    `tarifas` e `irradiacao` podem ser escalares ou arrays do mesmo tamanho.
+    Retorna um dict de arrays, um elemento por conta.
+    """
+    contas, tarifas, irradiacao = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(contas, dtype=float)),
+        np.asarray(tarifas, dtype=float),
+        np.asarray(irradiacao, dtype=float),
+    )
+
+    consumo = np.maximum(np.ceil(contas / tarifas), CONSUMO_MINIMO_KWH)
+    geracao_por_kwp = irradiacao * DIAS_MES * FATOR_DESEMPENHO
+    kwp_necessario = consumo / geracao_por_kwp
+    modulos = np.maximum(np.ceil(np.round(kwp_necessario, 6) / POTENCIA_MODULO_KWP), 1)
+    potencia_final = modulos * POTENCIA_MODULO_KWP
+    geracao = np.round(potencia_final * geracao_por_kwp)
+
+    area = modulos * AREA_MODULO_M2
+    area_excedente = np.maximum(area - AREA_LOTE_M2, 0)
+    lotes = area / AREA_LOTE_M2
+
+    custo = potencia_final * CUSTO_POR_KWP + area_excedente * VALOR_M2_EXCEDENTE
+    valor_com_desconto = custo - DESCONTO
+
+    tabela = parcelas(valor_com_desconto)
+    p60, p72, p84 = (tabela[:, np.flatnonzero(PRAZOS == prazo)[0]] for prazo in (60, 72, 84))
+    # 60x por padrão; 72x se a parcela passar da conta; 84x se ainda passar.
+    numero_parcelas = np.where(p60 <= contas, 60, np.where(p72 <= contas, 72, 84))
+    parcela_mensal = np.where(numero_parcelas == 60, p60, np.where(numero_parcelas == 72, p72, p84))
+
+    # Economia: a tarifa sobe e a geração degrada uma vez por ano, então a
+    # economia mensal é constante dentro de cada ano. A matriz é por ano
+    # (n x horizonte), não por mês, para caber em lotes grandes.
+    fator_ano = ((1 + REAJUSTE_TARIFA_ANUAL) * (1 - DEGRADACAO_ANUAL)) ** np.arange(HORIZONTE_PAYBACK_ANOS)
+    economia_mensal = (geracao * tarifas)[:, np.newaxis] * fator_ano
+    acumulada_fim_ano = np.cumsum(economia_mensal * 12, axis=1)
+    economia_10_anos = acumulada_fim_ano[:, 9]
+
+    # Payback: primeiro ano em que a economia acumulada cobre o investimento
+    # e, dentro dele, o mês em que isso acontece.
+    atingiu = acumulada_fim_ano >= valor_com_desconto[:, np.newaxis]
+    ano = atingiu.argmax(axis=1)
+    linhas = np.arange(len(ano))
+    acumulada_inicio_ano = acumulada_fim_ano[linhas, ano] - economia_mensal[linhas, ano] * 12
+    mes_no_ano = np.ceil((valor_com_desconto - acumulada_inicio_ano) / economia_mensal[linhas, ano])
+    meses_retorno = np.where(atingiu.any(axis=1), ano * 12 + mes_no_ano, np.nan)
+    payback = np.round(meses_retorno / 12, 1)
+
+    return {
+        "conta": contas,
+        "tarifa": tarifas,
+        "irradiacao": irradiacao,
+        "consumo_kwh": consumo,
+        "kwp_necessario": np.round(kwp_necessario, 2),
+        "modulos": modulos.astype(int),
+        "potencia_final_kwp": np.round(potencia_final, 2),
+        "geracao_kwh": geracao,
+        "excedente_kwh": geracao - consumo,
+        "area_m2": area,
+        "area_excedente_m2": area_excedente,
+        "lotes": np.round(lotes, 2),
+        "custo": np.round(custo, 2),
+        "desconto": np.full_like(custo, DESCONTO),
+        "valor_com_desconto": np.round(valor_com_desconto, 2),
+        "parcelas": np.round(tabela, 2),
+        "numero_parcelas": numero_parcelas,
+        "parcela_mensal": np.round(parcela_mensal, 2),
+        "economia_10_anos": np.round(economia_10_anos, 2),
+        "payback_anos": payback,
+        "mensalidade_associacao": np.round(lotes * TAXA_ASSOCIACAO, 2),
+    }
+
+
+def campos_proposta(conta, tarifa=TARIFA_PADRAO, irradiacao=IRRADIACAO_PADRAO):
+    """Valores calculados de uma proposta, com os nomes usados por generate_proposal.py."""
+    resultado = calcular(conta, tarifa, irradiacao)
+    campos = {
+        "current_light_bill_value": float(resultado["conta"][0]),
+        "average_economy_10_years": float(resultado["economia_10_anos"][0]),
+        "ecolote_discount_value": float(resultado["valor_com_desconto"][0]),
+    }
+    for prazo, valor in zip(PRAZOS, resultado["parcelas"][0]):
+        campos[f"parcela_{prazo}x"] = float(valor)
+    return campos
+
+
+def para_registros(resultado):
+    """Converte o dict de arrays de calcular() em uma lista de dicts (um por conta)."""
+    registros = []
+    for i in range(len(resultado["conta"])):
+        registro = {}
+        for chave, valores in resultado.items():
+            valor = valores[i]
+            if chave == "parcelas":
+                registro[chave] = {f"{prazo}x": float(v) for prazo, v in zip(PRAZOS, valor)}
+            elif np.isnan(valor):
+                registro[chave] = None
+            else:
+                registro[chave] = valor.item()
+        registros.append(registro)
+    return registros
+
+
+if __name__ == "__main__":
+    # Pontua em lote: uma conta por linha no stdin (número ou objeto com
+    # current_light_bill_value) e um resultado JSON por linha no stdout.
+    entradas = [json.loads(linha) for linha in sys.stdin if linha.strip()]
+    contas = [e["current_light_bill_value"] if isinstance(e, dict) else e for e in entradas]
+    for registro in para_registros(calcular(contas)):
+        print(json.dumps(registro, ensure_ascii=False))
@@ -1,383 +1,357 @@
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from reportlab.lib.colors import HexColor
+import argparse
+import hashlib
+import io
 import os
 import json
 import sys
-from datetime import datetime
-
-# --- Configurações e Estilos --- #
-
-# Cores da marca (baseadas na análise do PDF)
-COLOR_PRIMARY = HexColor("#06B6D4")  # Azul claro
-COLOR_SECONDARY = HexColor("#8B5CF6") # Roxo
-COLOR_ACCENT = HexColor("#DCFCE7")   # Verde claro (para fundos)
-COLOR_TEXT_DARK = HexColor("#1E293B") # Texto escuro
-COLOR_TEXT_LIGHT = HexColor("#64748B") # Texto secundário
-
-# Caminho para a logo (assumindo que estará no mesmo diretório ou em um assets)
-LOGO_PATH = os.path.join(os.path.dirname(__file__), "ecolote_logo.png")
-
-# Estilos de parágrafo
-styles = getSampleStyleSheet()
-
-styles.add(ParagraphStyle(name='TitleProposal', 
-                          parent=styles['h1'], 
-                          fontName='Helvetica-Bold', 
-                          fontSize=24, 
-                          leading=28, 
-                          alignment=TA_CENTER,
-                          textColor=COLOR_TEXT_DARK))
-
-styles.add(ParagraphStyle(name='SubtitleProposal', 
-                          parent=styles['h2'], 
-                          fontName='Helvetica-Bold', 
-                          fontSize=16, 
-                          leading=20, 
-                          alignment=TA_LEFT,
-                          textColor=COLOR_TEXT_DARK,
-                          spaceAfter=10))
-
-styles.add(ParagraphStyle(name='NormalText', 
-                          parent=styles['Normal'], 
-                          fontName='Helvetica', 
-                          fontSize=10, 
-                          leading=14, 
-                          textColor=COLOR_TEXT_DARK))
-
-styles.add(ParagraphStyle(name='SmallText', 
-                          parent=styles['Normal'], 
-                          fontName='Helvetica', 
-                          fontSize=8, 
-                          leading=10, 
-                          textColor=COLOR_TEXT_LIGHT))
-
-styles.add(ParagraphStyle(name='HighlightValue', 
-                          parent=styles['Normal'], 
-                          fontName='Helvetica-Bold', 
-                          fontSize=20, 
-                          leading=24, 
-                          alignment=TA_CENTER,
-                          textColor=COLOR_SECONDARY))
-
-styles.add(ParagraphStyle(name='HighlightLabel', 
-                          parent=styles['Normal'], 
-                          fontName='Helvetica-Bold', 
-                          fontSize=12, 
-                          leading=14, 
-                          alignment=TA_CENTER,
-                          textColor=COLOR_TEXT_LIGHT))
-
-styles.add(ParagraphStyle(name='SectionHeader', 
-                          parent=styles['h2'], 
-                          fontName='Helvetica-Bold', 
-                          fontSize=14, 
-                          leading=18, 
-                          alignment=TA_LEFT,
-                          textColor=COLOR_PRIMARY,
-                          spaceAfter=5,
-                          borderPadding=5,
-                          borderColor=COLOR_PRIMARY,
-                          borderWidth=0.5,
-                          borderPadding=0,
-                          underline=True))
-
-styles.add(ParagraphStyle(name='ListItem', 
-                          parent=styles['Normal'], 
-                          fontName='Helvetica', 
-                          fontSize=10, 
-                          leading=14, 
-                          textColor=COLOR_TEXT_DARK,
-                          leftIndent=15))
-
-# --- Funções de Geração de Elementos --- #
-
-def create_header(doc_data):
-    # Header com logo, título e dados da proposta
-    logo = Image(LOGO_PATH, width=1.5*cm, height=1.5*cm)
-    logo.hAlign = 'LEFT'
-
-    header_table_data = [
-        [logo, Paragraph("SOLUÇÕES ENERGÉTICAS DE CONFIANÇA", styles["h2"], alignment=TA_RIGHT)],
-        ["", Paragraph(f"Proposta: {doc_data.get('proposal_number', 'N/A')}<br/>Data: {doc_data.get('proposal_date', 'N/A')}<br/>Válida até: {doc_data.get('valid_until', 'N/A')}", styles["SmallText"])]
-    ]
-
-    header_table_style = TableStyle([
-        ('ALIGN', (0,0), (0,0), 'LEFT'),
-        ('ALIGN', (1,0), (1,0), 'RIGHT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('LEFTPADDING', (0,0), (-1,-1), 0),
-        ('RIGHTPADDING', (0,0), (-1,-1), 0),
-        ('TOPPADDING', (0,0), (-1,-1), 0),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 0),
-        ('SPAN', (0,0), (0,1)),
-        ('BACKGROUND', (0,0), (-1,-1), COLOR_ACCENT)
-    ])
-
-    header_table = Table(header_table_data, colWidths=[A4[0]*0.2, A4[0]*0.8]) # Ajustado colWidths
-    header_table.setStyle(header_table_style)
-    return header_table
-
-def create_footer():
-    # Footer com informações de contato
-    footer_text = [
-        Paragraph("Ecolote", styles["SmallText"]),
-        Paragraph("www.ecolote.com.br", styles["SmallText"], alignment=TA_CENTER),
-        Paragraph("(81) 98596-7343", styles["SmallText"], alignment=TA_RIGHT)
-    ]
-    footer_table = Table([footer_text], colWidths=[A4[0]/3, A4[0]/3, A4[0]/3])
-    footer_table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (0,0), 'LEFT'),
-        ('ALIGN', (1,0), (1,0), 'CENTER'),
-        ('ALIGN', (2,0), (2,0), 'RIGHT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('LEFTPADDING', (0,0), (-1,-1), 0),
-        ('RIGHTPADDING', (0,0), (-1,-1), 0),
-        ('TOPPADDING', (0,0), (-1,-1), 0),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 0),
-    ]))
-    return footer_table
+import time
+
+from proposal_assets import asset_version
+from proposal_cache import ProposalCache
+
+# reportlab (proposal_layout), pypdf e numpy (calculadora_solar) só são
+# importados quando a proposta precisa mesmo ser renderizada ou calculada:
+# acertos no cache e o --help não pagam esses imports.
+
+# Layout do PDF (estilos e páginas). A versão do template é o hash desse
+# arquivo e deste script, mais a versão dos assets (logo e resolução) e as
+# versões instaladas de reportlab e pypdf: qualquer mudança no layout, na
+# montagem, na logo ou nas bibliotecas invalida os caches sozinha.
+LAYOUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "proposal_layout.py")
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+def installed_version(package):
+    # Versão pelo nome da pasta .dist-info no sys.path, sem importar a
+    # biblioteca nem importlib.metadata (que sozinho custa dezenas de ms).
+    prefix = f"{package}-"
+    for entry in sys.path:
+        try:
+            names = os.listdir(entry or ".")
+        except OSError:
+            continue
+        for name in names:
+            if name.lower().startswith(prefix) and name.endswith((".dist-info", ".egg-info")):
+                return name[len(prefix):].rsplit(".", 1)[0]
+    return "ausente"
+
+def template_version():
+    digest = hashlib.sha256()
+    for path in (LAYOUT_PATH, os.path.abspath(__file__)):
+        with open(path, "rb") as source:
+            digest.update(hashlib.sha256(source.read()).digest())
+    digest.update(asset_version().encode())
+    for package in ("reportlab", "pypdf"):
+        digest.update(f"\n{package}={installed_version(package)}".encode())
+    return digest.hexdigest()[:12]
+
+TEMPLATE_VERSION = template_version()
+
+# Com False (ou sem pypdf) o documento inteiro é diagramado a cada proposta.
+MERGE_STATIC_PAGES = True
+
+# PDFs já gerados, reaproveitados quando os dados e o template são os mesmos.
+# PROPOSAL_CACHE_MAX_MB=0 desliga o cache.
+PROPOSAL_CACHE_DIR = os.getenv("PROPOSAL_CACHE_DIR", os.path.join(CACHE_DIR, "pdfs"))
+PROPOSAL_CACHE_MAX_MB = float(os.getenv("PROPOSAL_CACHE_MAX_MB", "200"))
+
+_pypdf = None
+
+def load_pypdf():
+    # Devolve o módulo pypdf, ou None se não estiver instalado.
+    global _pypdf
+    if _pypdf is None:
+        try:
+            import pypdf
+            _pypdf = pypdf
+        except ImportError:
+            _pypdf = False
+    return _pypdf or None
+
+def layout():
+    import proposal_layout
+    return proposal_layout
+
+_static_pages = {}
+
+def static_pages_reader():
+    # As páginas estáticas são diagramadas uma vez por versão do template e
+    # guardadas em disco, para que também o modo de execução única as reaproveite.
+    if TEMPLATE_VERSION not in _static_pages:
+        cache_path = os.path.join(CACHE_DIR, f"static_pages_{TEMPLATE_VERSION}.pdf")
+        try:
+            with open(cache_path, "rb") as f:
+                content = f.read()
+        except OSError:
+            pdf_layout = layout()
+            buffer = io.BytesIO()
+            pdf_layout.build_document(pdf_layout.new_document(buffer), pdf_layout.build_static_story())
+            content = buffer.getvalue()
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(content)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                print(f"Aviso: não foi possível gravar o cache do template: {e}", file=sys.stderr)
+        _static_pages[TEMPLATE_VERSION] = load_pypdf().PdfReader(io.BytesIO(content))
+    return _static_pages[TEMPLATE_VERSION]
 
 def generate_proposal_pdf(output_path, data):
-    doc = SimpleDocTemplate(output_path, pagesize=A4, 
-                            rightMargin=2*cm, leftMargin=2*cm,
-                            topMargin=2*cm, bottomMargin=2*cm)
-    
-    story = []
-
-    # --- Capa (Sugestão de Melhoria) ---
-    # if data.get(\'include_cover\', False):
-    #     story.append(Paragraph("PROPOSTA COMERCIAL", styles["TitleProposal"]))
-    #     story.append(Spacer(0, 0.5*cm))
-    #     story.append(Paragraph(data.get(\'client_name\', \'Condomínio/Sobrado\'), styles["SubtitleProposal"], alignment=TA_CENTER))
-    #     story.append(Spacer(0, 2*cm))
-    #     # Adicionar imagem do prédio aqui
-    #     story.append(Spacer(0, 10*cm))
-    #     story.append(Paragraph("SOLUÇÕES ENERGÉTICAS DE CONFIANÇA", styles["h2"], alignment=TA_CENTER))
-    #     story.append(Paragraph("com uma parceria para vida!", styles["NormalText"], alignment=TA_CENTER))
-    #     story.append(PageBreak())
-
-    # --- Página 1: Resumo Financeiro --- #
-    story.append(Paragraph("PROPOSTA COMERCIAL", styles["TitleProposal"]))
-    story.append(Paragraph(data.get('client_name', 'Condomínio Sobrado'), styles["SubtitleProposal"], alignment=TA_CENTER))
-    story.append(Spacer(0, 0.5*cm))
-
-    # Resumo Financeiro da Proposta
-    story.append(Paragraph("RESUMO FINANCEIRO DA PROPOSTA", styles["SectionHeader"]))
-    story.append(Spacer(0, 0.5*cm))
-
-    # Tabela de valores
-    resumo_data = [
-        [
-            Paragraph("Valor indicado da conta de luz", styles["HighlightLabel"]),
-            Paragraph("Sua economia média em 10 anos", styles["HighlightLabel"])
-        ],
-        [
-            Paragraph(f"R$ {data.get('current_light_bill_value', 0.00):.2f}", styles["HighlightValue"]),
-            Paragraph(f"R$ {data.get('average_economy_10_years', 0.00):.2f}", styles["HighlightValue"])
-        ]
-    ]
-    resumo_table = Table(resumo_data, colWidths=[A4[0]/2 - 2*cm, A4[0]/2 - 2*cm])
-    resumo_table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BACKGROUND', (0,0), (-1,-1), COLOR_ACCENT),
-        ('GRID', (0,0), (-1,-1), 0.5, HexColor("#E0E0E0")), # Linhas da grade
-        ('LEFTPADDING', (0,0), (-1,-1), 10),
-        ('RIGHTPADDING', (0,0), (-1,-1), 10),
-        ('TOPPADDING', (0,0), (-1,-1), 10),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 10),
-        ('ROUNDEDCORNERS', (0,0), (-1,-1), 10) # Cantos arredondados
-    ]))
-    story.append(resumo_table)
-    story.append(Spacer(0, 1*cm))
-
-    # Valor do Ecolote com desconto
-    story.append(Paragraph("Valor do Ecolote com desconto", styles["HighlightLabel"]))
-    story.append(Paragraph(f"R$ {data.get('ecolote_discount_value', 0.00):.2f}", ParagraphStyle('TitleProposalColored', parent=styles["TitleProposal"], textColor=COLOR_SECONDARY)))
-    story.append(Paragraph("À vista; Boleto Bancário; Financiamento em até 84 vezes", styles["NormalText"], alignment=TA_CENTER))
-    story.append(Spacer(0, 1*cm))
-
-    # Financiamento
-    story.append(Paragraph("FINANCIAMENTO", styles["SectionHeader"]))
-    story.append(Spacer(0, 0.5*cm))
-    story.append(Paragraph("Com o pagamento da 1ª parcela em até 4 meses.", styles["NormalText"]))
-    story.append(Spacer(0, 0.5*cm))
-
-    # Tabela de opções de financiamento
-    financiamento_data = [
-        ["36x de", "48x de", "60x de", "72x de", "84x de"],
-        [
-            f"R$ {data.get('parcela_36x', 0.00):.2f}",
-            f"R$ {data.get('parcela_48x', 0.00):.2f}",
-            f"R$ {data.get('parcela_60x', 0.00):.2f}",
-            f"R$ {data.get('parcela_72x', 0.00):.2f}",
-            f"R$ {data.get('parcela_84x', 0.00):.2f}"
-        ]
-    ]
-    financiamento_table = Table(financiamento_data, colWidths=[A4[0]/5 - 2*cm/5]*5)
-    financiamento_table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BACKGROUND', (0,0), (-1,-1), COLOR_ACCENT),
-        ('GRID', (0,0), (-1,-1), 0.5, HexColor("#E0E0E0")), # Linhas da grade
-        ('LEFTPADDING', (0,0), (-1,-1), 5),
-        ('RIGHTPADDING', (0,0), (-1,-1), 5),
-        ('TOPPADDING', (0,0), (-1,-1), 5),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 5),
-        ('ROUNDEDCORNERS', (0,0), (-1,-1), 5)
-    ]))
-    story.append(financiamento_table)
-    story.append(Spacer(0, 0.5*cm))
-    story.append(Paragraph("Sujeito a aprovação de crédito. Parcelas podem sofrer alterações de acordo com a analise feita pelo banco escolhido.", styles["SmallText"], alignment=TA_CENTER))
-    story.append(Spacer(0, 1*cm))
-
-    # --- Página 2: Para Seu Bolso e Apenas o Ecolote Oferece --- #
-    story.append(PageBreak()) # Adicionado para garantir nova página
-    story.append(Paragraph("PARA SEU BOLSO", styles["SectionHeader"]))
-    story.append(Spacer(0, 0.5*cm))
-    
-    # Benefícios para o bolso
-    beneficios_bolso = [
-        "Manutenção nos equipamentos Incluído na mensalidade",
-        "Redução de até 90% na conta de energia",
-        "Valorização de todos os apartamentos do condomínio",
-        "Troca de equipamentos fora da garantia a preço de fábrica",
-        "Acumule kWh não utilizados por até 5 anos"
-    ]
-    for item in beneficios_bolso:
-        story.append(Paragraph(f"• {item}", styles["ListItem"]))
-        story.append(Spacer(0, 0.2*cm))
-    story.append(Spacer(0, 1*cm))
-
-    story.append(Paragraph("APENAS O ECOLOTE OFERECE!", styles["SectionHeader"]))
-    story.append(Spacer(0, 0.5*cm))
-
-    # O que o Ecolote oferece
-    ecolote_oferece = [
-        ["Equipamento de última geração", "Projeto de homologação em parceria com sua concessionária"],
-        ["Monitoramento constante, 24/7, da sua usina e equipamento", "Seguro para sua usina já incluso na mensalidade paga a associação"]
-    ]
-    # Ajuste para garantir que cada par de itens fique em uma linha separada
-    for row_items in ecolote_oferece:
-        table_row_content = []
-        for item in row_items:
-            table_row_content.append(Paragraph(item, styles["NormalText"], alignment=TA_CENTER))
-        story.append(Table([table_row_content], colWidths=[A4[0]/2 - 2*cm]*2))
-        story.append(Spacer(0, 0.5*cm))
-    story.append(Spacer(0, 1*cm))
-
-    # --- Página 3: Passo a Passo da Entrega --- #
-    story.append(PageBreak()) # Adicionado para garantir nova página
-    story.append(Paragraph("ENTENDA O PASSO A PASSO DA ENTREGA DA SUA SOLUÇÃO", styles["SectionHeader"]))
-    story.append(Spacer(0, 0.5*cm))
-
-    passo_a_passo = [
-        ("1", "Análise da proposta. Você está aqui.", "Pré-cadastro pode ser feito até 20/08/2025"),
-        ("2", "Realizar o Pré-Cadastro", "Escolha a sua pretenção de compra.\nFinanciamento leva até 5 dias para aprovação"),
-        ("3", "Início das Vendas", "Início das vendas dia 21/08/2025\nDesconto Garantido aos pré-cadastrados"),
-        ("4", "Assinatura do Contrato", "Envio da documentação e análise para o financiamento.\nApós aprovação o condomínio irá ingressar na associação Ecolote"),
-        ("5", "Instalação / Homologação", "Até 45 dias para entrega da usina\nAcesso as câmeras de monitoramento liberado"),
-        ("6", "Início da Produção", "A partir desse ponto sua usina já estará injetando energia na rede e acumulando kWh\nAcesso ao aplicativo de controle de kWh gerados da usina liberado")
-    ]
-
-    for num, title, desc in passo_a_passo:
-        story.append(Paragraph(f"<b>{num}</b> - {title}", styles["SubtitleProposal"]))
-        story.append(Paragraph(desc, styles["NormalText"]))
-        story.append(Spacer(0, 0.5*cm))
-    story.append(Spacer(0, 1*cm))
-
-    # --- Página 4: Como Funciona a Geração de Energia Remota --- #
-    story.append(PageBreak()) # Adicionado para garantir nova página
-    story.append(Paragraph("COMO FUNCIONA A GERAÇÃO DE ENERGIA REMOTA", styles["SectionHeader"]))
-    story.append(Spacer(0, 0.5*cm))
-
-    como_funciona = [
-        ("1", "Ao aderir ao Ecolote, sua energia é gerada pela sua usina solar e injetada diretamente na rede da concessionária. Os créditos de energia gerados (kWh) são abatidos na sua conta de luz, levando a conta até a taxação mínima"),
-        ("2", "A energia gerada será acompanhada por aplicativo, o que dará maior controle sobre a energia injetada na rede"),
-        ("3", "A associação ficará responsável pela segurança e manutenção do local tendo uma taxa de R$ 85,37/mês"),
-        ("4", "Dentro do mês, se a energia consumida for menor do que a energia gerada, você acumula créditos para os meses seguintes.")
-    ]
-
-    for num, desc in como_funciona:
-        story.append(Paragraph(f"<b>{num}</b> - {desc}", styles["NormalText"]))
-        story.append(Spacer(0, 0.5*cm))
-    story.append(Spacer(0, 1*cm))
-
-    # --- Página 5: Informações Importantes --- #
-    story.append(PageBreak()) # Adicionado para garantir nova página
-    story.append(Paragraph("TRABALHAMOS COM UM DOS MELHORES PAINÉIS SOLARES DO MUNDO", styles["SectionHeader"]))
-    story.append(Spacer(0, 0.5*cm))
-    story.append(Paragraph("São produtos eficientes, com a durabilidade média de 25 anos e que obtiveram classificação AAA no ranking de bancabilidade.", styles["NormalText"]))
-    story.append(Spacer(0, 1*cm))
-
-    story.append(Paragraph("INFORMAÇÕES IMPORTANTES", styles["SectionHeader"]))
-    story.append(Spacer(0, 0.5*cm))
-
-    info_importantes = [
-        "**Ecolote: Detalhes Essenciais para Sua Decisão Inteligente!**",
-        "Para que você e seu condomínio tomem a melhor decisão, reunimos informações cruciais que destacam os diferenciais e a segurança de ter o Ecolote como sua fonte de energia.",
-        "**LOCALIZAÇÃO E EFICIÊNCIA: O SOL A SEU FAVOR**",
-        "Nosso bairro solar está estrategicamente localizado no sertão de Pernambuco. Essa região privilegiada garante um dos maiores índices de irradiação solar do Brasil, o que se traduz em:",
-        "*Maior Aproveitamento:* Seus equipamentos operam com máxima eficiência.",
-        "*Maior Potência:* Geração de energia otimizada, garantindo mais créditos para sua conta de luz.",
-        "*Confiabilidade:* Um ambiente ideal para a produção contínua de energia limpa.",
-        "**SEU ECOLOTE: UM ATIVO VALIOSO PARA O CONDOMÍNIO**",
-        "A aquisição do Ecolote não é uma despesa, é um investimento em um ativo tangível e seguro. Garantimos que a propriedade do seu Ecolote será *registrada em cartório em nome do condomínio*, proporcionando segurança jurídica e valorização patrimonial.",
-        "**SEGURANÇA E GARANTIA: TRANQUILIDADE PARA SEU INVESTIMENTO**",
-        "*Seguro Total:* Sua usina conta com seguro contra roubo, furto, incêndio e desastres naturais, garantindo a proteção do seu patrimônio.",
-        "*Manutenção Inclusa:* A manutenção preventiva e corretiva está inclusa na taxa associativa, assegurando o bom funcionamento e a longevidade do seu sistema.",
-        "*Garantia de Geração:* Comprometemo-nos com a eficiência da sua usina, garantindo a geração de energia prometida.",
-        "**FLEXIBILIDADE E ECONOMIA: ADAPTAÇÃO ÀS SUAS NECESSIDADES**",
-        "*Créditos de Energia:* Acumule créditos de energia não utilizados por até 5 anos, garantindo que nenhum kWh seja desperdiçado.",
-        "*Troca de Equipamentos:* Após o período de garantia, oferecemos a troca de equipamentos a preço de fábrica, mantendo sua usina sempre atualizada e eficiente.",
-        "*Flexibilidade de Pagamento:* Diversas opções de financiamento para se adequar ao seu orçamento, com parcelas que cabem no seu bolso.",
-        "**TRANSPARÊNCIA E SUPORTE: PARCERIA PARA A VIDA**",
-        "*Monitoramento 24/7:* Acompanhe a performance da sua usina em tempo real através de um aplicativo intuitivo.",
-        "*Suporte Dedicado:* Nossa equipe está sempre pronta para auxiliar em qualquer dúvida ou necessidade.",
-        "*Documentação Clara:* Todos os termos e condições são apresentados de forma transparente, sem letras miúdas.",
-        "**Ecolote: A escolha inteligente para um futuro mais sustentável e econômico.**"
-    ]
-
-    for item in info_importantes:
-        story.append(Paragraph(item, styles["NormalText"]))
-        story.append(Spacer(0, 0.2*cm))
-    story.append(Spacer(0, 1*cm))
+    pdf_layout = layout()
+    pypdf = load_pypdf() if MERGE_STATIC_PAGES else None
+    if pypdf is None:
+        # Sem pypdf não há como juntar PDFs: monta o documento inteiro.
+        story = pdf_layout.build_dynamic_story(data) + [pdf_layout.PageBreak()] + pdf_layout.build_static_story()
+        pdf_layout.build_document(pdf_layout.new_document(output_path), story)
+        return
 
     # --- Geração do PDF --- #
+    # Só a página 1 é diagramada; as estáticas vêm prontas do cache.
+    first_pages = io.BytesIO()
+    pdf_layout.build_document(pdf_layout.new_document(first_pages), pdf_layout.build_dynamic_story(data))
+    writer = pypdf.PdfWriter(clone_from=pypdf.PdfReader(first_pages))
+    for page in static_pages_reader().pages:
+        writer.add_page(page)
+    writer.write(output_path)
+
+# Dados de exemplo para teste (os campos enviados pelo Node.js sobrescrevem estes)
+EXAMPLE_DATA = {
+    "client_name": "Condomínio Exemplo Teste",
+    "proposal_number": "PRO-2025-001",
+    "proposal_date": "27/06/2025",
+    "valid_until": "27/07/2025",
+    "current_light_bill_value": 850.75,
+    "average_economy_10_years": 120000.00,
+    "ecolote_discount_value": 35000.00,
+    "parcela_36x": 1200.50,
+    "parcela_48x": 950.25,
+    "parcela_60x": 800.00,
+    "parcela_72x": 700.00,
+    "parcela_84x": 650.00,
+    "page_width": 17 * 72 / 2.54 # Largura do A4 (21 cm) menos as margens, em pontos
+}
+
+CALCULATED_FIELDS = ("average_economy_10_years", "ecolote_discount_value",
+                     "parcela_36x", "parcela_48x", "parcela_60x", "parcela_72x", "parcela_84x")
+
+def prepare_data(payload):
+    # Os valores financeiros que não vieram do chamador são calculados a partir
+    # da conta de luz (calculadora_solar, importada só quando precisa); o que
+    # ainda faltar vem de EXAMPLE_DATA.
+    calculated = {}
+    bill = payload.get("current_light_bill_value")
+    if bill is not None and any(field not in payload for field in CALCULATED_FIELDS):
+        from calculadora_solar import campos_proposta
+        options = {}
+        if payload.get("energy_rate") is not None:
+            options["tarifa"] = float(payload["energy_rate"])
+        if payload.get("solar_irradiance") is not None:
+            options["irradiacao"] = float(payload["solar_irradiance"])
+        calculated = campos_proposta(float(bill), **options)
+    return {**EXAMPLE_DATA, **calculated, **payload}
+
+def render_proposal_bytes(data):
+    # Renderiza em memória, sem tocar o disco.
+    buffer = io.BytesIO()
+    generate_proposal_pdf(buffer, data)
+    return buffer.getvalue()
+
+_proposal_cache = None
+
+def proposal_cache():
+    global _proposal_cache
+    if _proposal_cache is None and PROPOSAL_CACHE_MAX_MB > 0:
+        _proposal_cache = ProposalCache(PROPOSAL_CACHE_DIR, int(PROPOSAL_CACHE_MAX_MB * 1024 * 1024))
+    return _proposal_cache
+
+def render_proposal_cached(data):
+    # Devolve (bytes, acerto). Uma proposta já gerada com os mesmos dados e a
+    # mesma versão do template sai do cache sem ser renderizada de novo.
+    cache = proposal_cache()
+    if cache is None:
+        return render_proposal_bytes(data), False
+    key = ProposalCache.key(data, TEMPLATE_VERSION)
+    content = cache.get(key)
+    if content is not None:
+        return content, True
+    content = render_proposal_bytes(data)
+    cache.put(key, content)
+    return content, False
+
+def write_pdf(output_path, content):
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, output_path)
+
+def report_cache():
+    cache = _proposal_cache
+    if cache is not None:
+        print(f"Cache de propostas: {cache.hits} acertos, {cache.misses} falhas", file=sys.stderr)
+
+def frame_header(content, **fields):
+    # Cabeçalho JSON de uma linha com tamanho e hash; os bytes do PDF vêm
+    # logo em seguida, para o chamador ler exatamente `size` bytes.
+    header = {**fields, "size": len(content), "sha256": hashlib.sha256(content).hexdigest()}
+    return (json.dumps(header, ensure_ascii=False) + "\n").encode("utf-8")
+
+def run_worker(input_stream=sys.stdin, output=sys.stdout.buffer):
+    # Modo persistente: um job JSON por linha na entrada
+    # ({"id": ..., "output_path": ..., "data": {...}}) e um registro JSON por
+    # linha na saída para cada job. O processo, o reportlab e os estilos ficam
+    # carregados entre uma proposta e outra. Sem output_path, o registro traz
+    # size/sha256 e é seguido pelos bytes do PDF.
+    for line in input_stream:
+        line = line.strip()
+        if not line:
+            continue
+        job_id = None
+        content = None
+        start = time.perf_counter()
+        try:
+            job = json.loads(line)
+            job_id = job.get("id")
+            data = prepare_data(job.get("data", {}))
+            output_path = job.get("output_path")
+            pdf, hit = render_proposal_cached(data)
+            if output_path is None:
+                content = pdf
+                result = {"id": job_id, "ok": True}
+            else:
+                write_pdf(output_path, pdf)
+                result = {"id": job_id, "ok": True, "output_path": output_path}
+            result["cache"] = "hit" if hit else "miss"
+        except Exception as e:
+            print(f"Erro ao gerar PDF do job {job_id}: {e}", file=sys.stderr)
+            result = {"id": job_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        result["ms"] = round((time.perf_counter() - start) * 1000, 1)
+        if content is None:
+            output.write((json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8"))
+        else:
+            output.write(frame_header(content, **result) + content)
+        output.flush()
+    report_cache()
+
+def read_batch_jobs(input_stream):
+    # Cada linha é {"id", "data", "filename"} ou diretamente os dados da
+    # proposta (id = número da linha).
+    for number, line in enumerate(input_stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            payload = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {"id": number, "error": f"JSONDecodeError: {e}"}
+            continue
+        if isinstance(payload, dict) and isinstance(payload.get("data"), dict):
+            job_id = payload.get("id", number)
+            yield {"id": job_id, "data": payload["data"], "filename": payload.get("filename") or f"proposal_{job_id}.pdf"}
+        else:
+            yield {"id": number, "data": payload, "filename": f"proposal_{number}.pdf"}
+
+def _warm_batch_process():
+    # Initializer do pool: cada processo diagrama as páginas estáticas e abre
+    # o cache uma vez, antes do primeiro job.
+    layout()
+    if MERGE_STATIC_PAGES and load_pypdf() is not None:
+        static_pages_reader()
+    proposal_cache()
+
+def _render_batch_job(job):
+    start = time.perf_counter()
+    content, hit = render_proposal_cached(prepare_data(job["data"]))
+    return content, hit, round((time.perf_counter() - start) * 1000, 1)
+
+def run_batch(input_stream, out_dir=None, zip_path=None, processes=None, output=sys.stdout):
+    # Renderiza um lote em paralelo (ProcessPoolExecutor), gravando cada PDF
+    # assim que fica pronto e emitindo um registro JSON por job, na ordem em
+    # que terminam. Mantém no máximo alguns jobs por processo em voo para não
+    # carregar a entrada inteira na memória.
+    import zipfile
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+    processes = processes or os.cpu_count() or 1
+    max_in_flight = processes * 4
+    zip_file = zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) if zip_path else None
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    totals = {"ok": 0, "errors": 0}
+
+    def emit(record):
+        totals["ok" if record["ok"] else "errors"] += 1
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+
+    def finish(future, job):
+        try:
+            content, hit, ms = future.result()
+            filename = os.path.basename(job["filename"])
+            if zip_file is not None:
+                zip_file.writestr(filename, content)
+                destination = f"{zip_path}:{filename}"
+            else:
+                destination = os.path.join(out_dir, filename)
+                write_pdf(destination, content)
+            emit({"id": job["id"], "ok": True, "file": destination, "size": len(content),
+                  "sha256": hashlib.sha256(content).hexdigest(), "cache": "hit" if hit else "miss", "ms": ms})
+        except Exception as e:
+            emit({"id": job["id"], "ok": False, "error": f"{type(e).__name__}: {e}"})
+
+    start = time.perf_counter()
     try:
-        doc.build(story, onFirstPage=lambda canvas, doc: canvas.saveState(), onLaterPages=lambda canvas, doc: canvas.saveState())
-        print(f"PDF gerado com sucesso em: {output_path}")
-    except Exception as e:
-        print(f"Erro ao gerar PDF: {e}", file=sys.stderr)
-        sys.exit(1)
+        with ProcessPoolExecutor(max_workers=processes, initializer=_warm_batch_process) as executor:
+            in_flight = {}
+            for job in read_batch_jobs(input_stream):
+                if "error" in job:
+                    emit({"id": job["id"], "ok": False, "error": job["error"]})
+                    continue
+                in_flight[executor.submit(_render_batch_job, job)] = job
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(future, in_flight.pop(future))
+            for future in as_completed(in_flight):
+                finish(future, in_flight[future])
+    finally:
+        if zip_file is not None:
+            zip_file.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Lote concluído: {totals['ok']} PDFs, {totals['errors']} erros em {elapsed:.1f}s "
+          f"({totals['ok'] / elapsed if elapsed else 0:.1f} PDFs/s com {processes} processos)", file=sys.stderr)
+    return totals
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Uso: python generate_proposal.py <output_path>", file=sys.stderr)
-        sys.exit(1)
-
-    output_path = sys.argv[1]
-    
-    # Dados de exemplo para teste (serão substituídos pelos dados do Node.js)
-    example_data = {
-        "client_name": "Condomínio Exemplo Teste",
-        "proposal_number": "PRO-2025-001",
-        "proposal_date": "27/06/2025",
-        "valid_until": "27/07/2025",
-        "current_light_bill_value": 850.75,
-        "average_economy_10_years": 120000.00,
-        "ecolote_discount_value": 35000.00,
-        "parcela_36x": 1200.50,
-        "parcela_48x": 950.25,
-        "parcela_60x": 800.00,
-        "parcela_72x": 700.00,
-        "parcela_84x": 650.00,
-        "page_width": A4[0] - 4*cm # Largura da página menos as margens
-    }
+    parser = argparse.ArgumentParser(description="Gera propostas comerciais em PDF.")
+    parser.add_argument("output_path", nargs="?", help="Arquivo do PDF; '-' escreve no stdout um cabeçalho JSON (size, sha256) seguido dos bytes.")
+    parser.add_argument("--worker", action="store_true", help="Modo persistente: um job JSON por linha no stdin, um resultado por linha no stdout.")
+    parser.add_argument("--batch", metavar="NDJSON", help="Gera um lote de propostas a partir de um arquivo NDJSON ('-' para stdin).")
+    parser.add_argument("--out-dir", help="Diretório dos PDFs gerados com --batch.")
+    parser.add_argument("--zip", dest="zip_path", help="Grava os PDFs de --batch neste arquivo zip em vez de um diretório.")
+    parser.add_argument("--processes", type=int, help="Processos usados por --batch (padrão: núcleos da máquina).")
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker()
+        sys.exit(0)
+
+    if args.batch:
+        if not args.out_dir and not args.zip_path:
+            parser.error("--batch precisa de --out-dir ou --zip.")
+        if args.batch == "-":
+            totals = run_batch(sys.stdin, args.out_dir, args.zip_path, args.processes)
+        else:
+            with open(args.batch, encoding="utf-8") as input_stream:
+                totals = run_batch(input_stream, args.out_dir, args.zip_path, args.processes)
+        sys.exit(1 if totals["errors"] else 0)
+
+    if not args.output_path:
+        parser.error("informe output_path, --worker ou --batch.")
+
+    output_path = args.output_path
+    data_from_node = {}
 
     # Ler dados do stdin se houver
     if not sys.stdin.isatty(): # Verifica se há dados no stdin
@@ -385,11 +359,19 @@ if __name__ == "__main__":
             input_data = sys.stdin.read()
             if input_data:
                 data_from_node = json.loads(input_data)
-                example_data.update(data_from_node)
         except json.JSONDecodeError as e:
             print(f"Erro ao decodificar JSON do stdin: {e}", file=sys.stderr)
             sys.exit(1)
 
-    generate_proposal_pdf(output_path, example_data)
-
-
+    try:
+        content, _ = render_proposal_cached(prepare_data(data_from_node))
+        if output_path == "-":
+            sys.stdout.buffer.write(frame_header(content) + content)
+            sys.stdout.buffer.flush()
+        else:
+            write_pdf(output_path, content)
+            print(f"PDF gerado com sucesso em: {output_path}")
+        report_cache()
+    except Exception as e:
+        print(f"Erro ao gerar PDF: {e}", file=sys.stderr)
+        sys.exit(1)
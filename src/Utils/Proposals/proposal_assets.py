@@ -0,0 +1,151 @@
+import hashlib
+import io
+import os
+import sys
+
+# --- Assets das propostas (logo e fotos) --- #
+#
+# As imagens são reduzidas uma única vez para o tamanho em que aparecem no
+# PDF (na resolução ASSET_DPI) e gravadas em .cache/assets. Imagens sem
+# transparência viram JPEG, que o reportlab embute como está (DCTDecode),
+# sem decodificar a cada proposta; as com transparência ficam em PNG e
+# compartilham um único ImageReader, que guarda os pixels já decodificados.
+# Pillow, reportlab e urllib só são importados quando um asset é preparado.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGO_PATH = os.path.join(BASE_DIR, "ecolote_logo.png")
+ASSETS_DIR = os.path.join(BASE_DIR, ".cache", "assets")
+# Acervo de fotos dos leads gravado pelo coletor (googlePlacesFetch.py
+# --fotos local); as referências "/lead-photos/..." apontam para ele.
+LEAD_PHOTOS_DIR = os.environ.get("LEAD_PHOTOS_DIR", os.path.join(BASE_DIR, "..", "Leads", "fotos"))
+LEAD_PHOTOS_PREFIX = "/lead-photos/"
+# Fotos não baixadas (--fotos referencia): "/lead-photos/ref/<photo_reference>".
+LEAD_PHOTOS_REF_PREFIX = "/lead-photos/ref/"
+GOOGLE_PHOTO_URL = "https://maps.googleapis.com/maps/api/place/photo"
+
+ASSET_DPI = int(os.environ.get("PROPOSAL_ASSET_DPI", "200"))
+JPEG_QUALITY = int(os.environ.get("PROPOSAL_ASSET_JPEG_QUALITY", "85"))
+DOWNLOAD_TIMEOUT = 10
+
+_file_digests = {}
+_prepared = {}
+_readers = {}
+
+
+def file_digest(path):
+    # Hash do conteúdo (não do mtime): trocar o arquivo invalida o cache.
+    if path not in _file_digests:
+        with open(path, "rb") as f:
+            _file_digests[path] = hashlib.sha256(f.read()).hexdigest()
+    return _file_digests[path]
+
+
+def asset_version():
+    """Versão dos assets fixos do template: entra no TEMPLATE_VERSION."""
+    digest = hashlib.sha256(f"{ASSET_DPI}:{JPEG_QUALITY}\n".encode())
+    digest.update(file_digest(os.path.abspath(__file__)).encode())
+    digest.update(file_digest(LOGO_PATH).encode())
+    return digest.hexdigest()[:12]
+
+
+def _is_url(source):
+    return source.startswith(("http://", "https://"))
+
+
+def local_source(source):
+    # Foto do acervo dos leads -> arquivo local; referência do Google -> URL
+    # da API (com a chave do ambiente); o resto fica como está.
+    if source.startswith(LEAD_PHOTOS_REF_PREFIX):
+        api_key = os.environ.get("GOOGLE_PLACES_API_KEY")
+        reference = source[len(LEAD_PHOTOS_REF_PREFIX):]
+        if api_key and reference:
+            return f"{GOOGLE_PHOTO_URL}?maxwidth=400&photoreference={reference}&key={api_key}"
+        return source
+    if source.startswith(LEAD_PHOTOS_PREFIX):
+        relative = source[len(LEAD_PHOTOS_PREFIX):].split("/")
+        if ".." not in relative:
+            return os.path.join(LEAD_PHOTOS_DIR, *relative)
+    return source
+
+
+def _source_key(source):
+    # Arquivos locais pelo conteúdo; URLs (fotos dos leads) pelo endereço,
+    # para não baixar a foto só para descobrir que ela já está no cache.
+    if _is_url(source):
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+    return file_digest(source)
+
+
+def _open_source(source):
+    from PIL import Image as PILImage
+
+    if _is_url(source):
+        import urllib.request
+        with urllib.request.urlopen(source, timeout=DOWNLOAD_TIMEOUT) as response:
+            return PILImage.open(io.BytesIO(response.read()))
+    return PILImage.open(source)
+
+
+def _write_resized(source, width_px, height_px, base_path):
+    from PIL import ImageOps
+    from PIL import Image as PILImage
+
+    with _open_source(source) as original:
+        image = ImageOps.exif_transpose(original)
+        # Nunca amplia: só reduz para caber na caixa, mantendo a proporção.
+        image.thumbnail((width_px, height_px), PILImage.LANCZOS)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        if has_alpha:
+            path, fmt, options = f"{base_path}.png", "PNG", {"optimize": True}
+            image = image.convert("RGBA")
+        else:
+            path, fmt, options = f"{base_path}.jpg", "JPEG", {"quality": JPEG_QUALITY, "optimize": True}
+            image = image.convert("RGB")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        image.save(tmp, fmt, dpi=(ASSET_DPI, ASSET_DPI), **options)
+    os.replace(tmp, path)
+    return path
+
+
+def prepared_image(source, width, height):
+    """Caminho do asset reduzido para width x height pontos.
+
+    Devolve None se a foto não puder ser obtida (download com erro ou
+    arquivo inexistente); um arquivo local com problema volta sem otimização.
+    """
+    width_px = max(1, round(width / 72 * ASSET_DPI))
+    height_px = max(1, round(height / 72 * ASSET_DPI))
+    key = (source, width_px, height_px)
+    if key in _prepared:
+        return _prepared[key]
+    source = local_source(source)
+
+    try:
+        base_path = os.path.join(ASSETS_DIR, f"{_source_key(source)[:32]}_{width_px}x{height_px}")
+        path = next((f"{base_path}{ext}" for ext in (".jpg", ".png") if os.path.exists(f"{base_path}{ext}")), None)
+        if path is None:
+            os.makedirs(ASSETS_DIR, exist_ok=True)
+            path = _write_resized(source, width_px, height_px, base_path)
+    except Exception as e:
+        print(f"Aviso: não foi possível preparar a imagem {source}: {e}", file=sys.stderr)
+        path = source if not _is_url(source) and os.path.exists(source) else None
+    _prepared[key] = path
+    return path
+
+
+def image_flowable(source, width, height, **kwargs):
+    """Flowable de imagem do platypus a partir do asset preparado (ou None)."""
+    from reportlab.lib.utils import ImageReader
+    from reportlab.platypus import Image
+
+    path = prepared_image(source, width, height)
+    if path is None:
+        return None
+    flowable = Image(path, width=width, height=height, **kwargs)
+    if not path.endswith(".jpg"):
+        # PNG: todas as propostas desenham o mesmo ImageReader, decodificado
+        # uma vez por processo.
+        if path not in _readers:
+            _readers[path] = ImageReader(path)
+        flowable._img = _readers[path]
+    return flowable
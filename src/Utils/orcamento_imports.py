@@ -0,0 +1,75 @@
+"""Confere o tempo de import dos pontos de entrada Python.
+
+Cada módulo é importado num interpretador novo com `python -X importtime`.
+Falha (código de saída 1) se o import passar do orçamento ou se puxar uma
+dependência pesada que só deveria ser carregada quando for usada.
+
+Uso:
+    python orcamento_imports.py
+    python orcamento_imports.py --folga 2.0   # máquinas lentas / CI
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# (pasta, módulo, orçamento em ms, módulos que não podem aparecer no import)
+ORCAMENTOS = [
+    ("Leads", "googlePlacesFetch", 200, ["pandas", "psycopg2", "numpy"]),
+    ("Proposals", "generate_proposal", 60, ["reportlab", "pypdf", "numpy"]),
+    ("Proposals", "calculadora_solar", 150, ["reportlab", "pypdf"]),
+]
+
+
+def medir_import(pasta, modulo):
+    """Devolve (tempo total do import em ms, conjunto de módulos importados)."""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=os.path.join(DIRETORIO, pasta), capture_output=True, text=True,
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(f"import {modulo} falhou:\n{resultado.stderr.strip()}")
+
+    total_ms = 0.0
+    importados = set()
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, cumulativo, nome = (parte.strip() for parte in linha.split(":", 1)[1].split("|"))
+        if not cumulativo.isdigit():
+            continue  # cabeçalho
+        importados.add(nome)
+        if nome == modulo:
+            total_ms = int(cumulativo) / 1000
+    return total_ms, importados
+
+
+def conferir(folga=1.0, repeticoes=3):
+    falhas = []
+    for pasta, modulo, orcamento_ms, proibidos in ORCAMENTOS:
+        # Mediana de alguns interpretadores novos: o primeiro costuma pagar
+        # o cache de disco.
+        medicoes = [medir_import(pasta, modulo) for _ in range(repeticoes)]
+        tempos = sorted(tempo for tempo, _ in medicoes)
+        tempo_ms = tempos[len(tempos) // 2]
+        importados = medicoes[-1][1]
+
+        limite_ms = orcamento_ms * folga
+        pesados = sorted(p for p in proibidos if p in importados)
+        ok = tempo_ms <= limite_ms and not pesados
+        print(f"{'ok ' if ok else 'ERRO'} {modulo:<20} {tempo_ms:7.1f}ms (orçamento {limite_ms:.0f}ms)"
+              + (f" importou {', '.join(pesados)}" if pesados else ""))
+        if not ok:
+            falhas.append(modulo)
+    return falhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Orçamento de tempo de import dos scripts Python.")
+    parser.add_argument("--folga", type=float, default=1.0, help="Multiplica todos os orçamentos (ex.: 2.0 em CI lento).")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Interpretadores medidos por módulo (vale a mediana).")
+    args = parser.parse_args()
+
+    sys.exit(1 if conferir(args.folga, args.repeticoes) else 0)
@@ -3,6 +3,8 @@ const cors = require("cors");
 const routes = require("./routes");
 const proposalRoutes = require("./routes/proposalRoutes");
 const leadStatusHistoryRoutes = require("./routes/leadStatusHistoryRoutes");
+const { getLeadPhotoByReference, leadPhotosDir } = require("./controllers/leadPhotoController");
+const authenticateToken = require("./middlewares/authMiddleware");
 const path = require("path");
 
 console.log("DEBUG: Tipo do objeto \'routes\' importado em app.js:", typeof routes);
@@ -20,6 +22,14 @@ app.use(express.urlencoded({ extended: true }));
 // Servir arquivos estáticos dos PDFs gerados
 app.use("/generated_proposals", express.static(path.join(__dirname, "..", "generated_proposals")));
 
+// Miniaturas das fotos dos leads (googlePlacesFetch.py --fotos local). O nome
+// do arquivo é o hash do conteúdo, então podem ser cacheadas para sempre.
+// Fotos não baixadas (--fotos referencia) são buscadas no Google na primeira
+// exibição e guardadas no acervo; a rota exige login porque cada foto nova
+// é cobrada.
+app.get("/lead-photos/ref/:ref", authenticateToken, getLeadPhotoByReference);
+app.use("/lead-photos", express.static(leadPhotosDir, { immutable: true, maxAge: "365d" }));
+
 app.use("/api", routes);
 app.use("/api", proposalRoutes); 
 app.use("/api/leads", leadStatusHistoryRoutes);
@@ -0,0 +1,116 @@
+const crypto = require("crypto");
+const fs = require("fs");
+const path = require("path");
+const supabase = require("../config/supabaseClient");
+
+// Fotos dos leads coletados com googlePlacesFetch.py --fotos referencia: o
+// lead guarda /lead-photos/ref/<photo_reference> e esta rota busca a imagem
+// na API do Google com a chave do servidor, que nunca vai para o cliente.
+// Cada referência é cobrada uma única vez: a imagem fica no acervo local
+// (LEAD_PHOTOS_DIR/ref) e as próximas exibições saem do disco.
+const leadPhotosDir = process.env.LEAD_PHOTOS_DIR || path.join(__dirname, "..", "Utils", "Leads", "fotos");
+const referencePhotosDir = path.join(leadPhotosDir, "ref");
+const REFERENCE_PREFIX = "/lead-photos/ref/";
+const GOOGLE_PHOTO_URL = "https://maps.googleapis.com/maps/api/place/photo";
+const PHOTO_REFERENCE_PATTERN = /^[A-Za-z0-9_-]{1,2048}$/;
+// Mesma largura das URLs gravadas pelo coletor (LARGURA_FOTO).
+const PHOTO_MAX_WIDTH = 400;
+const PHOTO_TIMEOUT_MS = 10000;
+
+// Downloads em andamento por referência: pedidos simultâneos da mesma foto
+// esperam o mesmo download em vez de pagar outro.
+const pendingDownloads = new Map();
+
+function storedPhotoPath(ref, extension) {
+    const key = crypto.createHash("sha256").update(ref).digest("hex");
+    return path.join(referencePhotosDir, key.slice(0, 2), `${key}${extension}`);
+}
+
+function findStoredPhoto(ref) {
+    return [".jpg", ".png"]
+        .map((extension) => storedPhotoPath(ref, extension))
+        .find((photoPath) => fs.existsSync(photoPath));
+}
+
+async function leadHasReference(ref) {
+    const { data, error } = await supabase
+        .from("leads")
+        .select("id")
+        .contains("image_urls", [`${REFERENCE_PREFIX}${ref}`])
+        .limit(1);
+    if (error) {
+        throw new Error(`Erro ao buscar lead da foto: ${error.message}`);
+    }
+    return data.length > 0;
+}
+
+async function downloadPhoto(ref, apiKey) {
+    const url = new URL(GOOGLE_PHOTO_URL);
+    url.searchParams.set("maxwidth", String(PHOTO_MAX_WIDTH));
+    url.searchParams.set("photoreference", ref);
+    url.searchParams.set("key", apiKey);
+
+    // A API responde com um redirect para a imagem; o fetch segue.
+    const response = await fetch(url, { signal: AbortSignal.timeout(PHOTO_TIMEOUT_MS) });
+    if (response.status >= 500) {
+        throw new Error(`Places Photo API respondeu ${response.status}`);
+    }
+    if (!response.ok) {
+        return null;
+    }
+    const content = Buffer.from(await response.arrayBuffer());
+    const extension = (response.headers.get("content-type") || "").includes("png") ? ".png" : ".jpg";
+    const photoPath = storedPhotoPath(ref, extension);
+
+    // Gravação atômica: o arquivo só aparece completo.
+    await fs.promises.mkdir(path.dirname(photoPath), { recursive: true });
+    const tmpPath = `${photoPath}.${process.pid}.tmp`;
+    await fs.promises.writeFile(tmpPath, content);
+    await fs.promises.rename(tmpPath, photoPath);
+    return photoPath;
+}
+
+function fetchPhotoOnce(ref, apiKey) {
+    if (!pendingDownloads.has(ref)) {
+        const download = downloadPhoto(ref, apiKey).finally(() => pendingDownloads.delete(ref));
+        pendingDownloads.set(ref, download);
+    }
+    return pendingDownloads.get(ref);
+}
+
+const getLeadPhotoByReference = async (req, res) => {
+    const { ref } = req.params;
+    if (!PHOTO_REFERENCE_PATTERN.test(ref)) {
+        return res.status(400).json({ message: "Referência de foto inválida." });
+    }
+
+    try {
+        let photoPath = findStoredPhoto(ref);
+        if (!photoPath) {
+            // Só referências gravadas em algum lead chegam à API paga.
+            if (!(await leadHasReference(ref))) {
+                return res.status(404).json({ message: "Foto do lead não encontrada." });
+            }
+
+            const apiKey = process.env.GOOGLE_PLACES_API_KEY;
+            if (!apiKey) {
+                console.error("GOOGLE_PLACES_API_KEY não configurada: fotos por referência indisponíveis.");
+                return res.status(503).json({ message: "Fotos por referência indisponíveis." });
+            }
+
+            photoPath = await fetchPhotoOnce(ref, apiKey);
+            if (!photoPath) {
+                return res.status(404).json({ message: "Foto do lead não encontrada." });
+            }
+        }
+
+        // O arquivo não muda mais depois de gravado.
+        res.set("Cache-Control", "private, max-age=31536000, immutable");
+        res.sendFile(photoPath);
+    } catch (err) {
+        console.error("Erro ao buscar foto do lead:", err);
+        res.status(502).json({ message: "Erro ao buscar a foto do lead." });
+    }
+};
+
+module.exports = { getLeadPhotoByReference, leadPhotosDir };
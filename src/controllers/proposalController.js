@@ -1,15 +1,12 @@
-const { exec } = require("child_process");
 const path = require("path");
 const fs = require("fs");
 const supabase = require("../config/supabaseClient");
+const { renderProposal, renderProposalBuffer } = require("../services/proposalWorker");
 
 const generateProposal = async (req, res) => {
     const leadId = req.params.leadId;
     const proposalData = req.body; // Dados da proposta enviados pelo frontend
 
-    // Caminho para o script Python
-    const pythonScriptPath = path.join(__dirname, "../Utils/Proposals/generate_proposal.py");
-    
     // Caminho para salvar o PDF gerado
     const outputDir = path.join(__dirname, "../../generated_proposals");
     if (!fs.existsSync(outputDir)) {
@@ -19,39 +16,50 @@ const generateProposal = async (req, res) => {
     const outputPdfPath = path.join(outputDir, outputPdfName);
 
     try {
-        // Executar o script Python
-        const pythonProcess = exec(`python3 ${pythonScriptPath} "${outputPdfPath}"`, (error, stdout, stderr) => {
-            if (error) {
-                console.error(`exec error: ${error}`);
-                console.error(`Python Error: ${stderr}`);
-                return res.status(500).json({ message: "Erro ao gerar proposta", error: stderr });
-            }
-            console.log(`Python Output: ${stdout}`);
-
-            const pdfUrl = `/generated_proposals/${outputPdfName}`; // URL acessível pelo frontend
-
-            // Atualizar o PostgreSQL com a proposal_url
-            supabase
-                .from("leads")
-                .update({ proposal_url: pdfUrl, proposal_generated_at: new Date().toISOString() })
-                .eq("id", leadId)
-                .then(({ data, error }) => {
-                    if (error) {
-                        console.error("Erro ao atualizar lead com URL da proposta:", error);
-                        return res.status(500).json({ message: "Proposta gerada, mas erro ao atualizar lead no DB.", error: error.message });
-                    }
-                    res.status(200).json({ message: "Proposta gerada com sucesso!", pdfUrl: pdfUrl });
-                });
-        });
+        // Renderizar no worker Python persistente
+        const result = await renderProposal(outputPdfPath, proposalData);
+        console.log(`Proposta gerada em ${result.ms} ms: ${result.output_path}`);
+
+        const pdfUrl = `/generated_proposals/${outputPdfName}`; // URL acessível pelo frontend
+
+        // Atualizar o PostgreSQL com a proposal_url
+        const { error } = await supabase
+            .from("leads")
+            .update({ proposal_url: pdfUrl, proposal_generated_at: new Date().toISOString() })
+            .eq("id", leadId);
+        if (error) {
+            console.error("Erro ao atualizar lead com URL da proposta:", error);
+            return res.status(500).json({ message: "Proposta gerada, mas erro ao atualizar lead no DB.", error: error.message });
+        }
+        res.status(200).json({ message: "Proposta gerada com sucesso!", pdfUrl: pdfUrl });
 
-        // Enviar os dados da proposta para o script Python via stdin
-        pythonProcess.stdin.write(JSON.stringify(proposalData));
-        pythonProcess.stdin.end();
+    } catch (error) {
+        console.error("Erro ao gerar proposta:", error);
+        res.status(500).json({ message: "Erro ao gerar proposta", error: error.message });
+    }
+};
 
+// Gera a proposta em memória e devolve o PDF direto na resposta, sem gravar
+// em generated_proposals.
+const streamProposal = async (req, res) => {
+    const leadId = req.params.leadId;
+    const proposalData = req.body;
+
+    try {
+        const result = await renderProposalBuffer(proposalData);
+        console.log(`Proposta gerada em ${result.ms} ms (${result.size} bytes) para o lead ${leadId}`);
+
+        res.set({
+            "Content-Type": "application/pdf",
+            "Content-Length": result.size,
+            "Content-Disposition": `inline; filename="proposal_${leadId}.pdf"`,
+            "ETag": `"${result.sha256}"`,
+        });
+        res.status(200).end(result.content);
     } catch (error) {
-        console.error("Erro ao iniciar processo Python:", error);
-        res.status(500).json({ message: "Erro interno do servidor", error: error.message });
+        console.error("Erro ao gerar proposta:", error);
+        res.status(500).json({ message: "Erro ao gerar proposta", error: error.message });
     }
 };
 
-module.exports = { generateProposal };
\ No newline at end of file
+module.exports = { generateProposal, streamProposal };
\ No newline at end of file
@@ -4,6 +4,7 @@ const proposalController = require("../controllers/proposalController");
 const router = express.Router();
 
 router.post("/generate-proposal/:leadId", proposalController.generateProposal);
+router.post("/generate-proposal/:leadId/pdf", proposalController.streamProposal);
 
 module.exports = router;
 
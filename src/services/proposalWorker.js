@@ -0,0 +1,169 @@
+const { spawn } = require("child_process");
+const crypto = require("crypto");
+const path = require("path");
+
+const PYTHON_SCRIPT_PATH = path.join(__dirname, "../Utils/Proposals/generate_proposal.py");
+const JOB_TIMEOUT_MS = 60000;
+
+// Um único processo Python (generate_proposal.py --worker) atende todas as
+// propostas: cada job vai como uma linha JSON no stdin e volta como uma linha
+// JSON no stdout, identificado pelo id. Jobs sem output_path voltam com
+// size/sha256 na linha, seguida dos bytes do PDF.
+let worker = null;
+let nextJobId = 1;
+const pendingJobs = new Map();
+
+function failPendingJobs(child, error) {
+  for (const [id, job] of pendingJobs) {
+    if (job.child !== child) {
+      continue;
+    }
+    pendingJobs.delete(id);
+    clearTimeout(job.timer);
+    job.reject(error);
+  }
+}
+
+// Tira o processo de uso (o próximo job sobe um worker novo) e falha os jobs
+// que ainda esperavam por ele. Pode ser chamado mais de uma vez: spawn com
+// erro emite "error" e "close" sem "exit", e um processo morto emite os dois.
+function retireWorker(child, error) {
+  if (worker === child) {
+    worker = null;
+  }
+  failPendingJobs(child, error);
+}
+
+function settleJob(result, content) {
+  const job = pendingJobs.get(result.id);
+  if (!job) {
+    return;
+  }
+  pendingJobs.delete(result.id);
+  clearTimeout(job.timer);
+  if (!result.ok) {
+    job.reject(new Error(result.error));
+  } else if (content && crypto.createHash("sha256").update(content).digest("hex") !== result.sha256) {
+    job.reject(new Error(`PDF corrompido no job ${result.id} (sha256 não confere).`));
+  } else {
+    job.resolve(content ? { ...result, content } : result);
+  }
+}
+
+function createStdoutParser() {
+  let buffered = Buffer.alloc(0);
+  let awaitingContent = null;
+
+  return (chunk) => {
+    buffered = Buffer.concat([buffered, chunk]);
+    while (true) {
+      if (awaitingContent) {
+        if (buffered.length < awaitingContent.size) {
+          return;
+        }
+        const content = buffered.subarray(0, awaitingContent.size);
+        buffered = buffered.subarray(awaitingContent.size);
+        const result = awaitingContent;
+        awaitingContent = null;
+        settleJob(result, content);
+        continue;
+      }
+
+      const newline = buffered.indexOf(0x0a);
+      if (newline === -1) {
+        return;
+      }
+      const line = buffered.subarray(0, newline).toString("utf8");
+      buffered = buffered.subarray(newline + 1);
+
+      let result;
+      try {
+        result = JSON.parse(line);
+      } catch (error) {
+        console.error("Saída inválida do worker de propostas:", line);
+        continue;
+      }
+      if (result.ok && result.size !== undefined) {
+        awaitingContent = result;
+      } else {
+        settleJob(result, null);
+      }
+    }
+  };
+}
+
+function startWorker() {
+  const child = spawn("python3", [PYTHON_SCRIPT_PATH, "--worker"], {
+    stdio: ["pipe", "pipe", "pipe"],
+  });
+
+  child.stdout.on("data", createStdoutParser());
+
+  child.stderr.on("data", (data) => {
+    console.error(`Python Error: ${data}`);
+  });
+
+  child.stdin.on("error", (error) => {
+    console.error("Erro ao enviar job ao worker de propostas:", error);
+    retireWorker(child, new Error(`Worker de propostas indisponível: ${error.message}`));
+  });
+
+  child.on("error", (error) => {
+    console.error("Erro no worker de propostas:", error);
+    retireWorker(child, new Error(`Worker de propostas indisponível: ${error.message}`));
+  });
+
+  child.on("exit", (code, signal) => {
+    console.error(`Worker de propostas encerrado (code=${code}, signal=${signal}).`);
+    retireWorker(child, new Error("Worker de propostas encerrado antes de concluir o job."));
+  });
+
+  child.on("close", () => {
+    retireWorker(child, new Error("Worker de propostas encerrado antes de concluir o job."));
+  });
+
+  return child;
+}
+
+function submitJob(job) {
+  if (!worker) {
+    worker = startWorker();
+  }
+  const child = worker;
+  const id = nextJobId++;
+
+  return new Promise((resolve, reject) => {
+    const timer = setTimeout(() => {
+      pendingJobs.delete(id);
+      reject(new Error(`Tempo esgotado ao gerar a proposta (job ${id}).`));
+      // O worker atende um job por vez: travado neste, travaria todos os
+      // seguintes. Mata o processo e o próximo job sobe outro.
+      console.error(`Job ${id} excedeu ${JOB_TIMEOUT_MS}ms, reiniciando o worker de propostas.`);
+      retireWorker(child, new Error("Worker de propostas reiniciado após tempo esgotado."));
+      child.kill("SIGKILL");
+    }, JOB_TIMEOUT_MS);
+
+    pendingJobs.set(id, { resolve, reject, timer, child });
+    child.stdin.write(JSON.stringify({ id, ...job }) + "\n");
+  });
+}
+
+// Grava o PDF em outputPath (no disco do worker).
+function renderProposal(outputPath, proposalData) {
+  return submitJob({ output_path: outputPath, data: proposalData });
+}
+
+// Devolve os bytes do PDF em memória ({ content, size, sha256, ms }), para
+// enviar direto ao cliente ou a um storage sem arquivo temporário.
+function renderProposalBuffer(proposalData) {
+  return submitJob({ data: proposalData });
+}
+
+function stopWorker() {
+  if (worker) {
+    worker.stdin.end();
+    worker = null;
+  }
+}
+
+module.exports = { renderProposal, renderProposalBuffer, stopWorker };